@@ -182,3 +182,56 @@ PollOptionFormSet = inlineformset_factory(
     validate_min=True,
     max_num=8,
 )
+
+# ---------- Bulk actions ----------
+
+class IdListField(forms.Field):
+    """Repeated `ids` inputs (one checkbox per row) as a list of ints."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return sorted({int(v) for v in value})
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid selection.")
+
+class BulkActionForm(forms.Form):
+    ACTIONS = [
+        ("delete", "Delete"),
+        ("feature", "Feature"),
+        ("unfeature", "Unfeature"),
+        ("change_type", "Change type to…"),
+    ]
+    TARGET_TYPES = [("", "—"), ("text", "Health Tip"), ("article", "Article")]
+
+    action = forms.ChoiceField(choices=ACTIONS, widget=forms.Select(attrs={"class": SELECT_CSS}))
+    target_type = forms.ChoiceField(
+        choices=TARGET_TYPES, required=False, widget=forms.Select(attrs={"class": SELECT_CSS})
+    )
+    ids = IdListField(required=False)
+    # "Select all matching": act on every item of the listed type, not just
+    # the checked rows of the current page.
+    select_all = forms.BooleanField(required=False)
+    list_type = forms.ChoiceField(
+        choices=[("", "All")] + Content.CONTENT_TYPES, required=False, widget=forms.HiddenInput
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("action") == "change_type" and not cleaned.get("target_type"):
+            self.add_error("target_type", "Choose the type to change to.")
+        if not cleaned.get("select_all") and not cleaned.get("ids") and "ids" not in self.errors:
+            self.add_error("ids", "Select at least one item.")
+        return cleaned
+
+    def selected_ids(self):
+        """The checked ids, or with select_all every id in the listed type."""
+        if not self.cleaned_data["select_all"]:
+            return self.cleaned_data["ids"]
+        qs = Content.objects.order_by()
+        if self.cleaned_data["list_type"]:
+            qs = qs.filter(content_type=self.cleaned_data["list_type"])
+        return list(qs.values_list("pk", flat=True))
+
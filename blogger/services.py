@@ -0,0 +1,175 @@
+# blogger/services.py
+"""
+Write-side operations for the blogger views. Each runs as a fixed number
+of set-based queries inside one transaction, however many rows it
+touches, and invalidates caches once per call rather than once per row.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from core import prerender
+from core.caching import bump_content_generation, deferred_invalidation
+from core.models import Content, ContentDailyStats, Poll, PollOption
+
+# Types that can be switched in bulk without losing required data:
+# text tips and articles share the same fields (title/excerpt/body).
+TYPE_CONVERSIONS = {
+    "text": {"article"},
+    "article": {"text"},
+}
+
+
+def convertible_sources(target):
+    return {src for src, targets in TYPE_CONVERSIONS.items() if target in targets}
+
+
+def _delete_rows(qs):
+    """
+    One plain DELETE for `qs`. Content, Poll and PollOption have post_delete
+    receivers (core/signals.py), which make QuerySet.delete() load every
+    row and send a signal per row; callers bump the generation instead.
+    """
+    return qs._raw_delete(qs.db)
+
+
+def bulk_delete(ids):
+    """
+    Delete content with its polls, options and stats, children first, as
+    one DELETE per table. Returns {label: count} like QuerySet.delete().
+    Every model with a foreign key to Content must be listed here.
+    """
+    with transaction.atomic():
+        types = set(
+            Content.objects.filter(pk__in=ids)
+            .order_by()
+            .values_list("content_type", flat=True)
+            .distinct()
+        )
+        per_model = {}
+        for model, lookup in (
+            (PollOption, "poll__content_id__in"),
+            (Poll, "content_id__in"),
+            (ContentDailyStats, "content_id__in"),
+            (Content, "pk__in"),
+        ):
+            deleted = _delete_rows(model.objects.filter(**{lookup: ids}))
+            if deleted:
+                per_model[model._meta.label] = deleted
+        if per_model:
+            bump_content_generation()
+            prerender.refresh_contents(ids, types)
+    return per_model
+
+
+def bulk_set_featured(ids, featured):
+    """Feature or unfeature content. Returns the number of rows changed."""
+    with transaction.atomic():
+        updated = (
+            Content.objects.filter(pk__in=ids)
+            .exclude(is_featured=featured)
+            .update(is_featured=featured)
+        )
+        if updated:
+            bump_content_generation()  # update() sends no signals
+            prerender.refresh_contents(ids, [], structural=False)
+    return updated
+
+
+def bulk_change_type(ids, target):
+    """
+    Change content type where the conversion is valid. Returns (changed,
+    skipped) counts; items already of the target type are neither.
+    """
+    sources = convertible_sources(target)
+    with transaction.atomic():
+        per_type = dict(
+            Content.objects.filter(pk__in=ids)
+            .order_by()
+            .values_list("content_type")
+            .annotate(n=Count("id"))
+        )
+        changed_types = sources & set(per_type)
+        changed = 0
+        if changed_types:
+            changed = Content.objects.filter(pk__in=ids, content_type__in=changed_types).update(
+                content_type=target
+            )
+            bump_content_generation()
+            prerender.refresh_contents(ids, changed_types | {target})
+    skipped = sum(n for ctype, n in per_type.items() if ctype not in sources and ctype != target)
+    return changed, skipped
+
+
+def save_poll(content_form, poll_form, option_formset):
+    """
+    Persist validated poll forms in one transaction: the Content row, its
+    Poll, then only the option rows that actually changed (see
+    sync_poll_options). Returns the saved Content.
+    """
+    with transaction.atomic(), deferred_invalidation():
+        content = content_form.save()
+        poll = poll_form.save(commit=False)
+        poll.content = content
+        poll.save()
+        sync_poll_options(poll, option_formset)
+    return content
+
+
+def sync_poll_options(poll, option_formset):
+    """
+    Diff the submitted options against the stored ones and apply the
+    difference with at most one DELETE, one bulk UPDATE and one bulk
+    INSERT. Stored options are taken from the (already validated)
+    formset, so no extra read is needed.
+
+    Options keep their row (and vote count) when their text is unchanged
+    or edited in place; a removed option re-added with the same text
+    reuses its old row instead of starting again at zero votes.
+    """
+    # pk -> (instance, text as stored). Form validation has already copied
+    # the submitted text onto the instances, so the original is in `initial`.
+    stored = {
+        form.instance.pk: (form.instance, form.initial.get("option_text"))
+        for form in option_formset.initial_forms
+        if form.instance.pk
+    }
+
+    kept, to_update, unmatched = set(), [], []
+    for form in option_formset.forms:
+        data = getattr(form, "cleaned_data", None) or {}
+        text = (data.get("option_text") or "").strip()
+        if not text or data.get("DELETE"):
+            continue
+        pk = form.instance.pk
+        if pk in stored and pk not in kept:
+            kept.add(pk)
+            instance, original = stored[pk]
+            if text != original:
+                instance.option_text = text
+                to_update.append(instance)
+        else:
+            unmatched.append(text)
+
+    reusable = {
+        original: instance
+        for pk, (instance, original) in stored.items()
+        if pk not in kept
+    }
+    to_create = []
+    for text in unmatched:
+        instance = reusable.pop(text, None)
+        if instance is not None:
+            kept.add(instance.pk)
+        else:
+            to_create.append(PollOption(poll=poll, option_text=text))
+
+    to_delete = [pk for pk in stored if pk not in kept]
+    if to_delete:
+        _delete_rows(PollOption.objects.filter(pk__in=to_delete))
+    if to_update:
+        PollOption.objects.bulk_update(to_update, ["option_text"])
+    if to_create:
+        PollOption.objects.bulk_create(to_create)
+    if to_delete or to_update or to_create:
+        bump_content_generation()  # bulk writes send no signals
+
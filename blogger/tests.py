@@ -1,3 +1,297 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Content, ContentDailyStats, Poll, PollOption
+from . import services
+from .forms import PollContentForm, PollForm, PollOptionFormSet
+from .views import traffic_stats
+
+
+def poll_post_data(options, title="Sleep poll", question="How long do you sleep?"):
+    """
+    POST data for the poll form. `options` is a list of (pk or None, text)
+    or (pk, text, delete) tuples, one per option form.
+    """
+    initial = sum(1 for opt in options if opt[0])
+    data = {
+        "title": title,
+        "excerpt": "",
+        "question": question,
+        "options-TOTAL_FORMS": str(len(options)),
+        "options-INITIAL_FORMS": str(initial),
+        "options-MIN_NUM_FORMS": "2",
+        "options-MAX_NUM_FORMS": "8",
+    }
+    for i, (pk, text, *delete) in enumerate(options):
+        data[f"options-{i}-id"] = str(pk) if pk else ""
+        data[f"options-{i}-option_text"] = text
+        if delete and delete[0]:
+            data[f"options-{i}-DELETE"] = "on"
+    return data
+
+
+class SavePollTests(TestCase):
+    def setUp(self):
+        self.content = Content.objects.create(title="Sleep poll", content_type="poll")
+        self.poll = Poll.objects.create(content=self.content, question="How long do you sleep?")
+        self.yes = PollOption.objects.create(poll=self.poll, option_text="Under 6h", votes=5)
+        self.mid = PollOption.objects.create(poll=self.poll, option_text="6-8h", votes=7)
+        self.more = PollOption.objects.create(poll=self.poll, option_text="Over 8h", votes=2)
+
+    def bound_forms(self, data, content=None, poll=None):
+        cform = PollContentForm(data, instance=content)
+        pform = PollForm(data, instance=poll)
+        formset = PollOptionFormSet(data, instance=poll or Poll())
+        self.assertTrue(cform.is_valid(), cform.errors)
+        self.assertTrue(pform.is_valid(), pform.errors)
+        self.assertTrue(formset.is_valid(), formset.errors)
+        return cform, pform, formset
+
+    def test_create_inserts_options_in_one_query(self):
+        forms = self.bound_forms(poll_post_data([(None, "Yes"), (None, "No"), (None, "Sometimes")]))
+        # SAVEPOINT, INSERT content, INSERT poll, bulk INSERT options, RELEASE
+        with self.assertNumQueries(5):
+            content = services.save_poll(*forms)
+        self.assertEqual(
+            list(content.poll.options.order_by("id").values_list("option_text", flat=True)),
+            ["Yes", "No", "Sometimes"],
+        )
+
+    def test_unchanged_options_are_not_written(self):
+        forms = self.bound_forms(
+            poll_post_data([(o.pk, o.option_text) for o in (self.yes, self.mid, self.more)]),
+            content=self.content, poll=self.poll,
+        )
+        # SAVEPOINT, UPDATE content, UPDATE poll, RELEASE
+        with self.assertNumQueries(4):
+            services.save_poll(*forms)
+        self.assertEqual(
+            dict(PollOption.objects.values_list("option_text", "votes")),
+            {"Under 6h": 5, "6-8h": 7, "Over 8h": 2},
+        )
+
+    def test_diff_applies_one_query_per_kind_of_change(self):
+        forms = self.bound_forms(
+            poll_post_data([
+                (self.yes.pk, "Under 6h"),           # unchanged
+                (self.mid.pk, "6 to 8 hours"),       # renamed
+                (self.more.pk, "Over 8h", True),     # deleted
+                (None, "It varies"),                 # added
+            ]),
+            content=self.content, poll=self.poll,
+        )
+        # SAVEPOINT, UPDATE content, UPDATE poll, DELETE removed option,
+        # bulk UPDATE renamed, bulk INSERT added, RELEASE
+        with self.assertNumQueries(7):
+            services.save_poll(*forms)
+        self.assertEqual(
+            dict(PollOption.objects.values_list("option_text", "votes")),
+            {"Under 6h": 5, "6 to 8 hours": 7, "It varies": 0},
+        )
+
+    def test_readded_option_keeps_its_votes(self):
+        forms = self.bound_forms(
+            poll_post_data([
+                (self.yes.pk, "Under 6h", True),
+                (self.mid.pk, "6-8h"),
+                (self.more.pk, "Over 8h"),
+                (None, "Under 6h"),
+            ]),
+            content=self.content, poll=self.poll,
+        )
+        services.save_poll(*forms)
+        self.assertEqual(PollOption.objects.get(option_text="Under 6h").pk, self.yes.pk)
+        self.assertEqual(PollOption.objects.get(option_text="Under 6h").votes, 5)
+
+
+class PollViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("blogger", password="pw", is_staff=True)
+        self.client.force_login(user)
+
+    def test_edit_get_does_not_create_poll(self):
+        content = Content.objects.create(title="Orphan poll", content_type="poll")
+        response = self.client.get(reverse("blogger:content_edit", args=[content.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Poll.objects.filter(content=content).exists())
+
+    def test_create_poll_view(self):
+        response = self.client.post(
+            reverse("blogger:poll_create"), poll_post_data([(None, "Yes"), (None, "No"), (None, "")])
+        )
+        self.assertRedirects(response, reverse("blogger:poll_list"))
+        poll = Poll.objects.get(content__title="Sleep poll")
+        self.assertEqual(sorted(poll.options.values_list("option_text", flat=True)), ["No", "Yes"])
+
+    def test_invalid_options_save_nothing(self):
+        response = self.client.post(reverse("blogger:poll_create"), poll_post_data([(None, "Only one")]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Content.objects.exists())
+
+
+class BulkServiceTests(TestCase):
+    def setUp(self):
+        self.tip = Content.objects.create(title="Tip", content_type="text")
+        self.article = Content.objects.create(title="Read", content_type="article")
+        self.video = Content.objects.create(title="Watch", content_type="video")
+        self.poll_content = Content.objects.create(title="Vote", content_type="poll")
+        poll = Poll.objects.create(content=self.poll_content, question="Sleep enough?")
+        PollOption.objects.bulk_create(
+            [PollOption(poll=poll, option_text=text) for text in ("Yes", "No")]
+        )
+        ContentDailyStats.objects.create(content=self.poll_content, day=timezone.now().date(), views=3)
+        self.ids = [self.tip.pk, self.article.pk, self.video.pk, self.poll_content.pk]
+
+    def test_delete_is_one_query_per_table(self):
+        # SAVEPOINT, SELECT types, DELETE options, polls, stats, content, RELEASE
+        with self.assertNumQueries(7), self.captureOnCommitCallbacks() as callbacks:
+            per_model = services.bulk_delete(self.ids)
+        self.assertEqual(len(callbacks), 1)  # a single generation bump
+        self.assertEqual(per_model, {
+            "core.PollOption": 2, "core.Poll": 1, "core.ContentDailyStats": 1, "core.Content": 4,
+        })
+        self.assertFalse(Content.objects.exists())
+        self.assertFalse(PollOption.objects.exists())
+
+    def test_delete_types_query_has_no_ordering(self):
+        with CaptureQueriesContext(connection) as queries:
+            services.bulk_delete([self.tip.pk])
+        select = next(q["sql"] for q in queries if q["sql"].startswith("SELECT DISTINCT"))
+        self.assertNotIn("created_at", select)
+
+    def test_delete_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(services.bulk_delete([self.tip.pk + 100]), {})
+        self.assertEqual(callbacks, [])
+
+    def test_set_featured(self):
+        Content.objects.filter(pk=self.tip.pk).update(is_featured=True)
+        # SAVEPOINT, UPDATE, RELEASE
+        with self.assertNumQueries(3):
+            self.assertEqual(services.bulk_set_featured(self.ids, True), 3)
+        self.assertEqual(Content.objects.filter(is_featured=True).count(), 4)
+        self.assertEqual(services.bulk_set_featured(self.ids, True), 0)
+
+    def test_change_type_only_between_text_and_article(self):
+        # SAVEPOINT, SELECT count per type, UPDATE, RELEASE
+        with self.assertNumQueries(4):
+            changed, skipped = services.bulk_change_type(self.ids, "article")
+        self.assertEqual((changed, skipped), (1, 2))  # "Read" already is an article
+        self.assertEqual(
+            dict(Content.objects.values_list("title", "content_type")),
+            {"Tip": "article", "Read": "article", "Watch": "video", "Vote": "poll"},
+        )
+        self.assertEqual(services.bulk_change_type([self.video.pk], "text"), (0, 1))
+
+
+class BulkActionViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("blogger", password="pw", is_staff=True)
+        self.client.force_login(user)
+        self.url = reverse("blogger:bulk_action")
+        self.items = [
+            Content.objects.create(title=f"Tip {n}", content_type="text") for n in range(3)
+        ]
+        self.video = Content.objects.create(title="Watch", content_type="video")
+
+    def post(self, **data):
+        response = self.client.post(self.url, data, follow=True)
+        return response, [str(m) for m in response.context["messages"]]
+
+    def test_delete_reports_counts(self):
+        _, messages = self.post(action="delete", ids=[self.items[0].pk, self.items[1].pk], next="/blogger/text/")
+        self.assertEqual(messages, ["Deleted 2 item(s)."])
+        self.assertEqual(Content.objects.count(), 2)
+
+    def test_change_type_reports_skipped(self):
+        ids = [self.items[0].pk, self.video.pk]
+        _, messages = self.post(action="change_type", target_type="article", ids=ids)
+        self.assertEqual(messages, ["Changed 1 item(s) to article. Skipped 1 that cannot be converted."])
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.content_type, "video")
+
+    def test_change_type_to_a_non_text_type_is_rejected(self):
+        _, messages = self.post(action="change_type", target_type="poll", ids=[self.items[0].pk])
+        self.assertEqual(messages, [
+            "Select a valid choice. poll is not one of the available choices.",
+            "Choose the type to change to.",
+        ])
+        self.assertFalse(Content.objects.exclude(content_type__in=["text", "video"]).exists())
+
+    def test_form_errors(self):
+        _, messages = self.post(action="feature")
+        self.assertEqual(messages, ["Select at least one item."])
+        _, messages = self.post(action="change_type", ids=[self.items[0].pk])
+        self.assertEqual(messages, ["Choose the type to change to."])
+        _, messages = self.post(action="feature", ids=["1", "x"])
+        self.assertEqual(messages, ["Invalid selection."])
+
+    def test_unsafe_next_is_ignored(self):
+        response = self.client.post(
+            self.url, {"action": "feature", "ids": [self.items[0].pk], "next": "https://evil.example/"}
+        )
+        self.assertRedirects(response, reverse("blogger:dashboard"), fetch_redirect_response=False)
+        response = self.client.post(
+            self.url, {"action": "feature", "ids": [self.items[0].pk], "next": "/blogger/text/"}
+        )
+        self.assertRedirects(response, "/blogger/text/", fetch_redirect_response=False)
+
+    def test_select_all_matching_the_list(self):
+        _, messages = self.post(action="feature", select_all="on", list_type="text")
+        self.assertEqual(messages, ["Featured 3 item(s)."])
+        self.assertEqual(
+            set(Content.objects.filter(is_featured=True).values_list("content_type", flat=True)), {"text"}
+        )
+
+    def test_list_offers_select_all_matching_only_when_paginated(self):
+        response = self.client.get(reverse("blogger:text_list"))
+        self.assertNotContains(response, 'name="select_all"')
+        Content.objects.bulk_create([Content(title=f"More {n}", content_type="text") for n in range(12)])
+        response = self.client.get(reverse("blogger:text_list"))
+        self.assertContains(response, "All 15 matching this list")
+        self.assertContains(response, 'name="list_type" value="text"')
+
+
+class TrafficStatsTests(TestCase):
+    def test_series_totals_and_top_content(self):
+        today = timezone.now().date()
+        a = Content.objects.create(title="A", content_type="text")
+        b = Content.objects.create(title="B", content_type="article")
+        ContentDailyStats.objects.create(content=a, day=today, views=4, shares=1)
+        ContentDailyStats.objects.create(content=a, day=today - timedelta(days=1), views=2, votes=3)
+        ContentDailyStats.objects.create(content=b, day=today, views=6)
+        # Outside the window
+        ContentDailyStats.objects.create(content=b, day=today - timedelta(days=20), views=100)
+
+        stats = traffic_stats(days=7)
+        series = stats["traffic_series"]
+        self.assertEqual(len(series), 7)
+        self.assertEqual(series[-1]["day"], today)
+        self.assertEqual((series[-1]["views"], series[-1]["pct"]), (10, 100))
+        self.assertEqual((series[-2]["views"], series[-2]["pct"]), (2, 20))
+        self.assertEqual((series[0]["views"], series[0]["pct"]), (0, 0))
+        self.assertEqual(stats["traffic_totals"], {"views": 12, "votes": 3, "shares": 1})
+        self.assertEqual(
+            sorted((row["content__title"], row["views"], row["shares"]) for row in stats["top_content"]),
+            [("A", 6, 1), ("B", 6, 0)],
+        )
+
+    def test_top_content_is_ordered_by_views(self):
+        today = timezone.now().date()
+        a = Content.objects.create(title="A", content_type="text")
+        b = Content.objects.create(title="B", content_type="article")
+        ContentDailyStats.objects.create(content=a, day=today, views=1)
+        ContentDailyStats.objects.create(content=b, day=today, views=5)
+        self.assertEqual([row["content_id"] for row in traffic_stats()["top_content"]], [b.pk, a.pk])
 
-# Create your tests here.
+    def test_empty(self):
+        stats = traffic_stats()
+        self.assertEqual(stats["traffic_totals"], {"views": 0, "votes": 0, "shares": 0})
+        self.assertTrue(all(d["pct"] == 0 for d in stats["traffic_series"]))
+        self.assertEqual(stats["top_content"], [])
@@ -20,4 +20,6 @@ urlpatterns = [
     path("<int:pk>/edit/", views.edit_content, name="content_edit"),
     # delete
     path("<int:pk>/delete/", views.delete_content, name="content_delete"),
+    # bulk
+    path("bulk/", views.bulk_action, name="bulk_action"),
 ]
@@ -1,14 +1,22 @@
 # blogger/views.py
+from datetime import timedelta
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db.models import Sum
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 from django.utils.decorators import method_decorator
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
 from django.views.generic import ListView
 
-from core.models import Content, Poll
+from core import prerender
+from core.models import Content, ContentDailyStats, Poll
+from . import services
 from .forms import (
     TextContentForm, ArticleContentForm, VideoContentForm,
-    PollContentForm, PollForm, PollOptionFormSet
+    PollContentForm, PollForm, PollOptionFormSet, BulkActionForm
 )
 
 @login_required
@@ -19,7 +27,52 @@ def dashboard(request):
         "video": Content.objects.filter(content_type="video").count(),
         "poll": Content.objects.filter(content_type="poll").count(),
     }
-    return render(request, "blogger/dashboard.html", {"counts": counts})
+    return render(request, "blogger/dashboard.html", {"counts": counts, **traffic_stats()})
+
+STATS_DAYS = 14
+
+def traffic_stats(days=STATS_DAYS):
+    """
+    Per-day totals and top content for the dashboard charts.
+    Reads only the ContentDailyStats rollups, never the raw event log.
+    """
+    today = timezone.now().date()
+    start = today - timedelta(days=days - 1)
+    recent = ContentDailyStats.objects.filter(day__gte=start)
+
+    per_day = {
+        row["day"]: row
+        for row in recent.values("day").annotate(
+            views=Sum("views"), votes=Sum("votes"), shares=Sum("shares")
+        )
+    }
+    series = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        row = per_day.get(day, {})
+        series.append({
+            "day": day,
+            "views": row.get("views") or 0,
+            "votes": row.get("votes") or 0,
+            "shares": row.get("shares") or 0,
+        })
+    peak = max((d["views"] for d in series), default=0) or 1
+    for d in series:
+        d["pct"] = round(d["views"] * 100 / peak)
+
+    top_content = list(
+        recent.values("content_id", "content__title", "content__content_type")
+        .annotate(views=Sum("views"), shares=Sum("shares"))
+        .order_by("-views")[:5]
+    )
+    return {
+        "traffic_series": series,
+        "traffic_totals": {
+            key: sum(d[key] for d in series) for key in ("views", "votes", "shares")
+        },
+        "top_content": top_content,
+        "stats_days": days,
+    }
 
 @method_decorator(login_required, name="dispatch")
 class ContentListView(ListView):
@@ -40,6 +93,7 @@ class ContentListView(ListView):
         ctx = super().get_context_data(**kwargs)
         ctype = getattr(self, "type") or self.request.GET.get("type")
         ctx["ctype"] = ctype
+        ctx["bulk_form"] = BulkActionForm(initial={"list_type": ctype or ""})
         return ctx
 
 @login_required
@@ -47,7 +101,8 @@ def create_text(request):
     if request.method == "POST":
         form = TextContentForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            obj = form.save()
+            prerender.refresh_content(obj.pk, [obj.content_type])
             messages.success(request, "Text tip created.")
             return redirect("blogger:text_list")
     else:
@@ -59,7 +114,8 @@ def create_article(request):
     if request.method == "POST":
         form = ArticleContentForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            obj = form.save()
+            prerender.refresh_content(obj.pk, [obj.content_type])
             messages.success(request, "Article created.")
             return redirect("blogger:article_list")
     else:
@@ -71,7 +127,8 @@ def create_video(request):
     if request.method == "POST":
         form = VideoContentForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            obj = form.save()
+            prerender.refresh_content(obj.pk, [obj.content_type])
             messages.success(request, "Video post created.")
             return redirect("blogger:video_list")
     else:
@@ -83,20 +140,12 @@ def create_poll(request):
     if request.method == "POST":
         cform = PollContentForm(request.POST)
         pform = PollForm(request.POST)
-        if cform.is_valid() and pform.is_valid():
-            content = cform.save()
-            poll = pform.save(commit=False)
-            poll.content = content
-            poll.save()
-            formset = PollOptionFormSet(request.POST, instance=poll)
-            if formset.is_valid():
-                formset.save()
-                messages.success(request, "Poll created.")
-                return redirect("blogger:poll_list")
-        else:
-            # rebind formset too for errors
-            dummy_poll = Poll(content=Content(content_type="poll"))
-            formset = PollOptionFormSet(request.POST, instance=dummy_poll)
+        formset = PollOptionFormSet(request.POST, instance=Poll())
+        if cform.is_valid() and pform.is_valid() and formset.is_valid():
+            content = services.save_poll(cform, pform, formset)
+            prerender.refresh_content(content.pk, ["poll"])
+            messages.success(request, "Poll created.")
+            return redirect("blogger:poll_list")
     else:
         cform = PollContentForm()
         pform = PollForm()
@@ -116,6 +165,7 @@ def edit_content(request, pk):
             form = FormClass(request.POST, request.FILES, instance=obj)
             if form.is_valid():
                 form.save()
+                prerender.refresh_content(obj.pk, [obj.content_type], structural=False)
                 messages.success(request, "Text updated.")
                 return redirect("blogger:text_list")
         else:
@@ -131,6 +181,7 @@ def edit_content(request, pk):
             form = FormClass(request.POST, request.FILES, instance=obj)
             if form.is_valid():
                 form.save()
+                prerender.refresh_content(obj.pk, [obj.content_type], structural=False)
                 messages.success(request, "Article updated.")
                 return redirect("blogger:article_list")
         else:
@@ -146,6 +197,7 @@ def edit_content(request, pk):
             form = FormClass(request.POST, request.FILES, instance=obj)
             if form.is_valid():
                 form.save()
+                prerender.refresh_content(obj.pk, [obj.content_type], structural=False)
                 messages.success(request, "Video updated.")
                 return redirect("blogger:video_list")
         else:
@@ -154,17 +206,15 @@ def edit_content(request, pk):
         return render(request, template, ctx)
 
     if obj.content_type == "poll":
-        poll = getattr(obj, "poll", None)
-        if poll is None:
-            poll = Poll.objects.create(content=obj, question="")
+        # Unsaved until the form is submitted; GETs never write.
+        poll = getattr(obj, "poll", None) or Poll(content=obj)
         if request.method == "POST":
             cform = PollContentForm(request.POST, instance=obj)
             pform = PollForm(request.POST, instance=poll)
             formset = PollOptionFormSet(request.POST, instance=poll)
             if cform.is_valid() and pform.is_valid() and formset.is_valid():
-                cform.save()
-                pform.save()
-                formset.save()
+                services.save_poll(cform, pform, formset)
+                prerender.refresh_content(obj.pk, ["poll"], structural=False)
                 messages.success(request, "Poll updated.")
                 return redirect("blogger:poll_list")
         else:
@@ -182,8 +232,44 @@ def edit_content(request, pk):
 def delete_content(request, pk):
     obj = get_object_or_404(Content, pk=pk)
     if request.method == "POST":
+        pk = obj.pk
         obj.delete()
+        prerender.refresh_content(pk, [obj.content_type])
         messages.success(request, "Deleted successfully.")
         # redirect to the correct list
         return redirect(f"blogger:{obj.content_type}_list")
     return render(request, "blogger/confirm_delete.html", {"object": obj})
+
+@login_required
+@require_POST
+def bulk_action(request):
+    form = BulkActionForm(request.POST)
+    nxt = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(nxt, allowed_hosts={request.get_host()}):
+        nxt = None
+
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect(nxt or "blogger:dashboard")
+
+    ids = form.selected_ids()
+    action = form.cleaned_data["action"]
+    if action == "delete":
+        per_model = services.bulk_delete(ids)
+        deleted = per_model.get("core.Content", 0)
+        polls = per_model.get("core.Poll", 0)
+        messages.success(request, f"Deleted {deleted} item(s)" + (f" and {polls} poll(s)." if polls else "."))
+    elif action in {"feature", "unfeature"}:
+        updated = services.bulk_set_featured(ids, action == "feature")
+        messages.success(request, f"{action.title()}d {updated} item(s).")
+    else:
+        target = form.cleaned_data["target_type"]
+        changed, skipped = services.bulk_change_type(ids, target)
+        msg = f"Changed {changed} item(s) to {target}."
+        if skipped:
+            msg += f" Skipped {skipped} that cannot be converted."
+        messages.success(request, msg)
+    return redirect(nxt or "blogger:dashboard")
+
@@ -1,5 +1,161 @@
-from django.contrib import admin
-from .models import Content
+import hashlib
 
-# Register your models here.
-admin.site.register(Content)
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
+
+from .caching import bump_content_generation, cached
+from .models import Content, Job, Poll, PollOption
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids an exact COUNT(*) over the whole table on every changelist load.
+
+    Unfiltered lists on PostgreSQL use the planner's row estimate once it
+    passes `cutoff`; everything else (filtered lists, small tables, other
+    databases) gets an exact count. Either way the result is cached for
+    the current content generation, so the exact count runs once per change.
+    """
+    cutoff = 10_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        try:
+            digest = hashlib.md5(str(qs.query).encode(), usedforsecurity=False).hexdigest()
+        except Exception:  # some queries cannot be rendered to SQL
+            return self._count(qs)
+        return cached(f"admin:count:{digest}", lambda: self._count(qs), timeout=5 * 60)
+
+    def _count(self, qs):
+        if connection.vendor == "postgresql" and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.cutoff:
+                return row[0]
+        return qs.order_by().count()
+
+
+class PollInline(admin.StackedInline):
+    model = Poll
+    fields = ["question", "options_summary"]
+    readonly_fields = ["options_summary"]
+    extra = 0
+    max_num = 1
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("options")
+
+    @admin.display(description="Options")
+    def options_summary(self, poll):
+        if not poll.pk:
+            return "Save the poll to add options."
+        rows = format_html_join(
+            "", "<li>{} ({} votes)</li>",
+            ((o.option_text, o.votes) for o in poll.options.all()),
+        )
+        url = reverse("admin:core_poll_change", args=[poll.pk])
+        return format_html('<ul>{}</ul><a href="{}">Edit options</a>', rows, url)
+
+
+@admin.register(Content)
+class ContentAdmin(admin.ModelAdmin):
+    # Only indexed columns: sorting or filtering on any of them stays cheap.
+    list_display = ["id", "title", "content_type", "is_featured", "created_at"]
+    list_display_links = ["id", "title"]
+    list_filter = ["content_type", "is_featured"]
+    ordering = ["-created_at", "-id"]
+    search_fields = ["title"]
+    search_help_text = "Search by ID or the start of the title."
+    readonly_fields = ["view_count", "created_at"]
+    inlines = [PollInline]
+    actions = ["make_featured", "make_unfeatured"]
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Index-friendly search: an ID, or a title prefix as a range scan on
+        the title index, tried with the usual capitalizations.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        condition = Q()
+        for variant in {term, term.lower(), term.capitalize(), term.title()}:
+            condition |= Q(title__gte=variant, title__lt=variant + "\uffff")
+        return queryset.filter(condition), False
+
+    def _set_featured(self, request, queryset, featured):
+        updated = queryset.exclude(is_featured=featured).update(is_featured=featured)
+        if updated:
+            bump_content_generation()  # update() sends no signals
+        self.message_user(request, f"{updated} item(s) updated.", messages.SUCCESS)
+
+    @admin.action(description="Feature selected content")
+    def make_featured(self, request, queryset):
+        self._set_featured(request, queryset, True)
+
+    @admin.action(description="Unfeature selected content")
+    def make_unfeatured(self, request, queryset):
+        self._set_featured(request, queryset, False)
+
+
+class PollOptionInline(admin.TabularInline):
+    model = PollOption
+    fields = ["option_text", "votes"]
+    extra = 0
+
+
+@admin.register(Poll)
+class PollAdmin(admin.ModelAdmin):
+    list_display = ["question", "content"]
+    list_select_related = ["content"]
+    raw_id_fields = ["content"]
+    inlines = [PollOptionInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "status", "attempts", "run_after", "created_at", "finished_at"]
+    list_filter = ["status", "kind"]
+    ordering = ["-created_at"]
+    search_fields = ["idempotency_key"]
+    readonly_fields = [f.name for f in Job._meta.fields]
+    actions = ["retry_now"]
+    # Not EstimatedCountPaginator: its counts are cached per content
+    # generation, which job writes never bump.
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected failed jobs now")
+    def retry_now(self, request, queryset):
+        retried = 0
+        for job in queryset.filter(status=Job.FAILED):
+            try:
+                with transaction.atomic():
+                    Job.objects.filter(pk=job.pk, status=Job.FAILED).update(
+                        status=Job.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None,
+                    )
+            except IntegrityError:
+                continue  # the same key is already queued again
+            retried += 1
+        self.message_user(request, f"{retried} job(s) queued for retry.", messages.SUCCESS)
@@ -0,0 +1,296 @@
+# core/analytics.py
+"""
+Append-only analytics event log.
+
+Request handlers call `record_event()`, which only puts a tuple on an
+in-memory queue. A background writer thread drains the queue and appends
+events in batches to hourly segment files under ANALYTICS_LOG_DIR:
+
+    events-<YYYYMMDDHH>-<pid>.log      one "epoch content_id kind" per line
+
+`rollup()` (run by the `rollup_analytics` management command) folds closed
+segments into the ContentDailyStats table, which is the only thing the
+dashboard reads. Only one rollup runs at a time per log directory, and
+each segment is counted exactly once even if a rollup crashes half-way.
+"""
+import atexit
+import fcntl
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Event kinds and the single-letter codes stored in the log.
+KINDS = {"view": "v", "vote": "p", "share": "s"}
+CODES = {code: kind for kind, code in KINDS.items()}
+
+# ContentDailyStats column for each kind.
+STAT_FIELDS = {"view": "views", "vote": "votes", "share": "shares"}
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".log"
+CLAIMED_SUFFIX = ".rolling"
+LOCK_NAME = ".rollup.lock"
+
+
+class RollupInProgress(Exception):
+    """Another rollup holds the lock on this log directory."""
+
+
+def log_dir():
+    return Path(settings.ANALYTICS_LOG_DIR)
+
+
+def segment_hour(ts):
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc).strftime("%Y%m%d%H")
+
+
+class EventWriter:
+    """
+    Batches events in memory and appends them to the current hourly segment.
+    Never blocks the caller: when the queue is full, events are dropped and
+    counted in `dropped`.
+    """
+    def __init__(self, directory, batch_size=500, flush_interval=2.0, max_queue=100_000):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.pid = os.getpid()
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, content_id, kind):
+        try:
+            self.queue.put_nowait((int(time.time()), content_id, KINDS[kind]))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Flush whatever is queued and stop the thread."""
+        try:
+            self.queue.put(self._stop, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+
+            if item is self._stop:
+                self._write(batch)
+                return
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch):
+        if not batch:
+            return
+        # Events can straddle an hour boundary; group so each lands in its own segment.
+        by_segment = defaultdict(list)
+        for ts, content_id, code in batch:
+            by_segment[segment_hour(ts)].append(f"{ts} {content_id} {code}\n")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for hour, lines in by_segment.items():
+                path = self.directory / f"{SEGMENT_PREFIX}{hour}-{self.pid}{SEGMENT_SUFFIX}"
+                with open(path, "a", encoding="ascii") as fh:
+                    fh.write("".join(lines))
+        except OSError:
+            logger.exception("Could not write %d analytics events", len(batch))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Process-wide writer, (re)started lazily so forked workers get their own thread."""
+    global _writer
+    if _writer is not None and _writer.pid == os.getpid():
+        return _writer
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = EventWriter(
+                log_dir(),
+                batch_size=getattr(settings, "ANALYTICS_BATCH_SIZE", 500),
+                flush_interval=getattr(settings, "ANALYTICS_FLUSH_INTERVAL", 2.0),
+            )
+            atexit.register(_writer.close)
+    return _writer
+
+
+def record_event(content_id, kind):
+    """Queue an analytics event. Cheap enough to call from any request."""
+    if not getattr(settings, "ANALYTICS_ENABLED", True):
+        return
+    if kind not in KINDS:
+        raise ValueError(f"Unknown analytics event kind: {kind!r}")
+    get_writer().record(content_id, kind)
+
+
+# ---------- Rollup ----------
+
+def closed_segments(directory, now=None, include_current=False):
+    """
+    Segments that are safe to roll up: everything before the current hour,
+    plus any segment claimed by a rollup that crashed half-way.
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    current = segment_hour(now if now is not None else time.time())
+    paths = []
+    for path in sorted(directory.iterdir()):
+        name = path.name
+        if not name.startswith(SEGMENT_PREFIX):
+            continue
+        if name.endswith(CLAIMED_SUFFIX):
+            paths.append(path)
+        elif name.endswith(SEGMENT_SUFFIX):
+            hour = name[len(SEGMENT_PREFIX):].split("-", 1)[0]
+            if include_current or hour < current:
+                paths.append(path)
+    return paths
+
+
+def read_segment(path):
+    """Aggregate one segment into {(content_id, day): {field: count}}."""
+    totals = defaultdict(lambda: defaultdict(int))
+    with open(path, encoding="ascii") as fh:
+        for line in fh:
+            try:
+                ts, content_id, code = line.split()
+                field = STAT_FIELDS[CODES[code]]
+                day = datetime.fromtimestamp(int(ts), tz=dt_timezone.utc).date()
+                totals[(int(content_id), day)][field] += 1
+            except (ValueError, KeyError):
+                # Torn or garbled line (e.g. crash mid-write): skip it.
+                continue
+    return totals
+
+
+def apply_totals(totals):
+    """Add aggregated counts to ContentDailyStats with one read and two bulk writes."""
+    from .models import Content, ContentDailyStats
+
+    if not totals:
+        return 0
+    content_ids = {cid for cid, _ in totals}
+    days = {day for _, day in totals}
+    live_ids = set(Content.objects.filter(pk__in=content_ids).values_list("pk", flat=True))
+
+    with transaction.atomic():
+        existing = {
+            (row.content_id, row.day): row
+            for row in ContentDailyStats.objects.select_for_update().filter(
+                content_id__in=live_ids, day__in=days
+            )
+        }
+        to_create, to_update = [], []
+        for (content_id, day), counts in totals.items():
+            if content_id not in live_ids:
+                continue  # content was deleted since the event was logged
+            row = existing.get((content_id, day))
+            if row is None:
+                to_create.append(ContentDailyStats(content_id=content_id, day=day, **counts))
+                continue
+            for field, n in counts.items():
+                setattr(row, field, getattr(row, field) + n)
+            to_update.append(row)
+        ContentDailyStats.objects.bulk_create(to_create, batch_size=1000)
+        ContentDailyStats.objects.bulk_update(
+            to_update, list(STAT_FIELDS.values()), batch_size=1000
+        )
+    return len(to_create) + len(to_update)
+
+
+@contextmanager
+def rollup_lock(directory):
+    """Exclusive, non-blocking lock on `directory`; released even if the process dies."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / LOCK_NAME, "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RollupInProgress(str(directory))
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def claim_segment(path):
+    """
+    Rename a closed segment to a unique `.rolling` name, or return a
+    segment already claimed by a crashed run as is. Returns None if the
+    file is gone. The claimed name identifies the segment from then on.
+    """
+    if path.name.endswith(CLAIMED_SUFFIX):
+        return path
+    claimed = path.with_name(f"{path.name}.{uuid.uuid4().hex}{CLAIMED_SUFFIX}")
+    try:
+        path.rename(claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+
+def rollup_segment(claimed):
+    """
+    Apply one claimed segment, recording it in the same transaction.
+    Returns the number of stats rows written (0 if it was already applied).
+    """
+    from .models import RolledUpSegment
+
+    with transaction.atomic():
+        if RolledUpSegment.objects.filter(name=claimed.name).exists():
+            rows = 0  # committed before a crash; only the file was left behind
+        else:
+            rows = apply_totals(read_segment(claimed))
+            RolledUpSegment.objects.create(name=claimed.name)
+    claimed.unlink(missing_ok=True)
+    RolledUpSegment.objects.filter(name=claimed.name).delete()
+    return rows
+
+
+def rollup(directory=None, now=None, include_current=False):
+    """
+    Fold closed segments into ContentDailyStats under the directory lock.
+    Raises RollupInProgress if another rollup is running.
+    Returns (segments processed, stats rows written).
+    """
+    directory = Path(directory or log_dir())
+    segments = rows = 0
+    with rollup_lock(directory):
+        for path in closed_segments(directory, now=now, include_current=include_current):
+            claimed = claim_segment(path)
+            if claimed is None:
+                continue
+            rows += rollup_segment(claimed)
+            segments += 1
+    return segments, rows
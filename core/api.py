@@ -0,0 +1,229 @@
+# core/api.py
+"""
+Read-only JSON API over Content, for the WhatsApp bot and mobile client.
+
+    GET /api/content/?type=article&fields=id,title&limit=20&cursor=...
+    GET /api/content/<pk>/?fields=id,title,poll
+
+Rows are serialized straight from .values() (no model instances), bodies
+are cached per content generation, and responses carry a weak ETag built
+from the generation so unchanged clients get a 304 without any query.
+view_count is included as of the last content change, not live.
+"""
+import base64
+import gzip
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_GET
+
+from .caching import cached, content_generation
+from .models import Content, Poll, PollOption
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+FIELDS = [
+    "id", "title", "content_type", "excerpt", "body", "image", "thumbnail",
+    "video_url", "created_at", "view_count", "is_featured", "url",
+    "reading_minutes", "meta_description",
+]
+LIST_FIELDS = ["id", "title", "content_type", "excerpt", "thumbnail", "created_at", "url"]
+DETAIL_FIELDS = FIELDS + ["poll"]
+FILE_FIELDS = {"image", "thumbnail"}
+COMPUTED_FIELDS = {"url", "poll"}
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_COMPRESS_BYTES = 512
+MAX_AGE = 60
+
+
+class ApiError(Exception):
+    pass
+
+
+def parse_fields(request, allowed, default):
+    """Requested fields, deduplicated and in `allowed` order so equal selections share a cache key."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(default)
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = sorted(fields - set(allowed))
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return [f for f in allowed if f in fields]
+
+
+def parse_list_params(request):
+    """(fields, type, limit, cursor) from the query string; anything else in it is ignored."""
+    fields = parse_fields(request, FIELDS, LIST_FIELDS)
+    try:
+        limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise ApiError("limit must be an integer")
+    ctype = (request.GET.get("type") or "").strip().lower()
+    if ctype and ctype not in {key for key, _ in Content.CONTENT_TYPES}:
+        raise ApiError(f"Unknown type: {ctype}")
+    cursor = request.GET.get("cursor")
+    return fields, ctype, limit, decode_cursor(cursor) if cursor else None
+
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError("Invalid cursor")
+    if created_at.tzinfo is None or not 0 < pk < 2**63:
+        raise ApiError("Invalid cursor")
+    return created_at, pk
+
+
+def detail_url(pk):
+    return reverse("content_detail", args=[pk])
+
+
+def serialize_row(row, fields):
+    out = {}
+    for field in fields:
+        if field == "url":
+            out["url"] = detail_url(row["id"])
+        elif field in FILE_FIELDS:
+            out[field] = default_storage.url(row[field]) if row[field] else None
+        elif field != "poll":
+            out[field] = row[field]
+    return out
+
+
+def poll_payload(content_id):
+    poll = Poll.objects.filter(content_id=content_id).values("id", "question").first()
+    if poll is None:
+        return None
+    options = list(
+        PollOption.objects.filter(poll_id=poll["id"]).order_by("id").values("id", "option_text", "votes")
+    )
+    total = sum(o["votes"] for o in options)
+    for option in options:
+        option["percent"] = round(option["votes"] * 100 / total, 1) if total else 0.0
+    return {**poll, "total_votes": total, "options": options}
+
+
+def to_json(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def build_list(path, fields, ctype, limit, cursor):
+    qs = Content.objects.order_by("-created_at", "-id")
+    if ctype:
+        qs = qs.filter(content_type=ctype)
+    if cursor:
+        created_at, pk = cursor
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    columns = {"id", "created_at"} | (set(fields) - COMPUTED_FIELDS)
+    rows = list(qs.values(*columns)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_url = None
+    if has_more:
+        params = {"type": ctype, "limit": limit if limit != DEFAULT_LIMIT else None}
+        if fields != LIST_FIELDS:
+            params["fields"] = ",".join(fields)
+        params["cursor"] = encode_cursor(rows[-1])
+        next_url = f"{path}?{urlencode({k: v for k, v in params.items() if v})}"
+    return to_json({
+        "results": [serialize_row(row, fields) for row in rows],
+        "next": next_url,
+    })
+
+
+def build_detail(pk, fields):
+    columns = {"id"} | (set(fields) - COMPUTED_FIELDS)
+    row = Content.objects.filter(pk=pk).values(*columns).first()
+    if row is None:
+        return None
+    payload = serialize_row(row, fields)
+    if "poll" in fields:
+        payload["poll"] = poll_payload(pk)
+    return to_json(payload)
+
+
+def api_etag(request, *args, **kwargs):
+    digest = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()[:16]
+    return f'W/"{content_generation()}-{digest}"'
+
+
+def compressed(request, body, status=200):
+    """JSON response, brotli- or gzip-encoded when the client accepts it."""
+    response = HttpResponse(body, status=status, content_type="application/json")
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if len(body) < MIN_COMPRESS_BYTES:
+        return response
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("Accept-Encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        response.content = brotli.compress(body)
+        response["Content-Encoding"] = "br"
+    elif "gzip" in accepted:
+        response.content = gzip.compress(body, compresslevel=6, mtime=0)
+        response["Content-Encoding"] = "gzip"
+    return response
+
+
+def error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def _serve(request, key, build):
+    body = cached(key, build)
+    if body is False:
+        return error("Not found", status=404)
+    response = compressed(request, body)
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
+
+
+# Cache keys are built from the parsed parameters, never the raw query
+# string: unknown parameters must not mint new entries.
+
+@require_GET
+@condition(etag_func=api_etag)
+def content_list(request):
+    try:
+        fields, ctype, limit, cursor = parse_list_params(request)
+    except ApiError as exc:
+        return error(str(exc))
+    position = f"{cursor[0].isoformat()}|{cursor[1]}" if cursor else ""
+    key = f"api:list:{ctype}:{limit}:{position}:{','.join(fields)}"
+    return _serve(request, key, lambda: build_list(request.path, fields, ctype, limit, cursor))
+
+
+@require_GET
+@condition(etag_func=api_etag)
+def content_detail(request, pk):
+    try:
+        fields = parse_fields(request, DETAIL_FIELDS, DETAIL_FIELDS)
+    except ApiError as exc:
+        return error(str(exc))
+    key = f"api:detail:{pk}:{','.join(fields)}"
+    return _serve(request, key, lambda: build_detail(pk, fields) or False)
@@ -0,0 +1,82 @@
+# core/caching.py
+"""
+Query-result caching for the public views.
+
+Every cached value is keyed by the current *content generation*, a
+millisecond timestamp stored in the cache and bumped whenever Content,
+Poll or PollOption rows change (see core/signals.py). Bumping the
+generation invalidates everything at once; old keys simply expire.
+
+Bulk writes can wrap themselves in `deferred_invalidation()` so the
+generation moves once per batch instead of once per row.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = "content:generation"
+DEFAULT_TIMEOUT = 60 * 60
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def content_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Lost (evicted/cleared): start a new generation, which is always safe.
+        cache.add(GENERATION_KEY, _now_ms(), None)
+        generation = cache.get(GENERATION_KEY) or _now_ms()
+    return generation
+
+
+def _bump():
+    current = cache.get(GENERATION_KEY) or 0
+    cache.set(GENERATION_KEY, max(_now_ms(), current + 1), None)
+
+
+def bump_content_generation():
+    """
+    Invalidate all generation-keyed entries. Inside a transaction this
+    happens on commit, so nothing can re-cache pre-commit data.
+    """
+    if getattr(_local, "depth", 0):
+        _local.pending = True
+        return
+    transaction.on_commit(_bump)
+
+
+@contextmanager
+def deferred_invalidation():
+    """Collapse every bump inside the block into a single bump at the end."""
+    _local.depth = getattr(_local, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+        if not _local.depth and getattr(_local, "pending", False):
+            _local.pending = False
+            bump_content_generation()
+
+
+def cached(name, compute, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for `name` in the current generation, computing it on a miss."""
+    key = f"{name}:g{content_generation()}"
+    value = cache.get(key)
+    if value is not None:
+        with _stats_lock:
+            stats["hits"] += 1
+        return value
+    value = compute()
+    cache.set(key, value, timeout)
+    with _stats_lock:
+        stats["misses"] += 1
+    return value
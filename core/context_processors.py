@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def css_bundle(request):
+    """Whether base.html links the self-hosted CSS bundle or the CDN assets."""
+    return {"css_bundle": settings.CSS_BUNDLE}
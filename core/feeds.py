@@ -0,0 +1,292 @@
+# core/feeds.py
+"""
+sitemap.xml and per-type RSS/Atom feeds, for crawlers and feed readers.
+
+    /sitemap.xml                    index of the shards below
+    /sitemap-pages.xml              home and the content list per type
+    /sitemap-content-<n>.xml        content with ids in ((n-1)*50k, n*50k]
+    /feeds/<type>.rss, .atom        latest FEED_ITEMS of one content type
+
+Bodies are generated row by row from a queryset iterator and streamed, so
+memory stays flat however many rows there are. While streaming, the body
+is spooled to FEEDS_CACHE_DIR/<generation>/; later requests in the same
+content generation stream that file instead of querying again, and
+conditional requests (ETag/Last-Modified from the generation) get a 304
+without touching the database at all.
+"""
+import mimetypes
+import os
+import shutil
+import tempfile
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, IntegerField, Max
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.views.decorators.http import condition, require_GET
+
+from .caching import cached, content_generation
+from .models import Content
+
+SHARD_SIZE = 50_000  # the sitemap protocol's per-file URL limit
+FEED_ITEMS = 50
+FEED_FORMATS = {
+    "rss": "application/rss+xml; charset=utf-8",
+    "atom": "application/atom+xml; charset=utf-8",
+}
+SITEMAP_CONTENT_TYPE = "application/xml; charset=utf-8"
+CHUNK_SIZE = 64 * 1024
+ITERATOR_CHUNK = 2000
+MAX_AGE = 15 * 60
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+IMAGE_NS = 'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"'
+
+
+# ---------- Generation-keyed spool ----------
+
+def _buffered(parts):
+    """Join small string parts into CHUNK_SIZE byte chunks."""
+    buffer, size = [], 0
+    for part in parts:
+        data = part.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _read(file):
+    with file:
+        while chunk := file.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _spool(path, chunks):
+    """Yield `chunks` while writing them to `path`; publish the file only if complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    complete = False
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        # The directory may have been pruned by a newer generation meanwhile.
+        with suppress(OSError):
+            if complete:
+                os.replace(tmp, path)
+            else:
+                os.unlink(tmp)
+
+
+def _prune(root, keep):
+    for entry in root.iterdir():
+        if entry.name != keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def cached_stream(request, name, generate):
+    """
+    Stream the body built by `generate(base_url)` (an iterator of str),
+    from the spool file for the current generation when there is one.
+    """
+    root = Path(settings.FEEDS_CACHE_DIR)
+    generation = str(content_generation())
+    # Bodies contain absolute URLs, so each scheme/host gets its own copy.
+    site = f"{request.scheme}_{request.get_host()}"
+    path = root / generation / site / name
+    try:
+        return _read(open(path, "rb"))
+    except FileNotFoundError:
+        pass
+    if not (root / generation).exists():
+        (root / generation).mkdir(parents=True, exist_ok=True)
+        _prune(root, keep=generation)
+    base_url = f"{request.scheme}://{request.get_host()}"
+    return _spool(path, _buffered(generate(base_url)))
+
+
+def generation_etag(request, *args, **kwargs):
+    return f'W/"{content_generation()}"'
+
+
+def generation_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(content_generation() / 1000, tz=timezone.utc)
+
+
+def streaming(body, content_type):
+    response = StreamingHttpResponse(body, content_type=content_type)
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
+
+
+# ---------- Sitemaps ----------
+
+def sitemap_shards():
+    """[(shard number, latest created_at in it)] for the non-empty shards."""
+    def compute():
+        shard = ExpressionWrapper((F("id") - 1) / SHARD_SIZE + 1, output_field=IntegerField())
+        return list(
+            Content.objects.order_by()
+            .annotate(shard=shard)
+            .values("shard")
+            .annotate(lastmod=Max("created_at"))
+            .order_by("shard")
+            .values_list("shard", "lastmod")
+        )
+    return cached("sitemap:shards", compute)
+
+
+def _media_url(base_url, file):
+    url = file.url
+    return url if "://" in url else base_url + url
+
+
+def sitemap_index_xml(base_url):
+    yield XML_HEADER
+    yield f"<sitemapindex {SITEMAP_NS}>\n"
+    yield f"<sitemap><loc>{escape(base_url + reverse('sitemap_pages'))}</loc></sitemap>\n"
+    for shard, lastmod in sitemap_shards():
+        loc = escape(base_url + reverse("sitemap_content", args=[shard]))
+        yield f"<sitemap><loc>{loc}</loc><lastmod>{rfc3339_date(lastmod)}</lastmod></sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def sitemap_pages_xml(base_url):
+    list_url = reverse("content_list")
+    yield XML_HEADER
+    yield f"<urlset {SITEMAP_NS}>\n"
+    yield f"<url><loc>{escape(base_url + reverse('home'))}</loc><changefreq>daily</changefreq></url>\n"
+    yield f"<url><loc>{escape(base_url + list_url)}</loc><changefreq>daily</changefreq></url>\n"
+    for ctype, _ in Content.CONTENT_TYPES:
+        loc = escape(f"{base_url}{list_url}?type={ctype}")
+        yield f"<url><loc>{loc}</loc><changefreq>daily</changefreq></url>\n"
+    yield "</urlset>\n"
+
+
+def sitemap_content_xml(shard, base_url):
+    rows = (
+        Content.objects.filter(id__gt=(shard - 1) * SHARD_SIZE, id__lte=shard * SHARD_SIZE)
+        .order_by("id")
+        .only("id", "created_at", "image", "thumbnail")
+        .iterator(chunk_size=ITERATOR_CHUNK)
+    )
+    yield XML_HEADER
+    yield f"<urlset {SITEMAP_NS} {IMAGE_NS}>\n"
+    for content in rows:
+        yield f"<url><loc>{escape(base_url + content.get_absolute_url())}</loc>"
+        yield f"<lastmod>{rfc3339_date(content.created_at)}</lastmod>"
+        image = content.image or content.thumbnail
+        if image:
+            yield f"<image:image><image:loc>{escape(_media_url(base_url, image))}</image:loc></image:image>"
+        yield "</url>\n"
+    yield "</urlset>\n"
+
+
+@require_GET
+@condition(etag_func=generation_etag, last_modified_func=generation_modified)
+def sitemap_index(request):
+    return streaming(cached_stream(request, "sitemap.xml", sitemap_index_xml), SITEMAP_CONTENT_TYPE)
+
+
+@require_GET
+@condition(etag_func=generation_etag, last_modified_func=generation_modified)
+def sitemap_pages(request):
+    return streaming(cached_stream(request, "sitemap-pages.xml", sitemap_pages_xml), SITEMAP_CONTENT_TYPE)
+
+
+@require_GET
+@condition(etag_func=generation_etag, last_modified_func=generation_modified)
+def sitemap_content(request, shard):
+    if shard not in {n for n, _ in sitemap_shards()}:
+        raise Http404("No such sitemap")
+    body = cached_stream(
+        request, f"sitemap-content-{shard}.xml", lambda base_url: sitemap_content_xml(shard, base_url)
+    )
+    return streaming(body, SITEMAP_CONTENT_TYPE)
+
+
+# ---------- RSS/Atom ----------
+
+def feed_items(ctype):
+    return (
+        Content.objects.filter(content_type=ctype)
+        .order_by("-created_at", "-id")
+        .only("id", "title", "created_at", "meta_description", "thumbnail")[:FEED_ITEMS]
+        .iterator(chunk_size=FEED_ITEMS)
+    )
+
+
+def _enclosure(file):
+    """(type, length) for an enclosure; length is 0 when the storage cannot tell."""
+    mime = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+    try:
+        length = file.size
+    except OSError:
+        length = 0
+    return mime, length
+
+
+def rss_xml(ctype, label, base_url):
+    list_url = escape(f"{base_url}{reverse('content_list')}?type={ctype}")
+    yield XML_HEADER
+    yield '<rss version="2.0"><channel>\n'
+    yield f"<title>{escape(label)} - Health Takeaways</title><link>{list_url}</link>"
+    yield f"<description>Latest {escape(label.lower())} posts from Health Takeaways</description>\n"
+    for content in feed_items(ctype):
+        link = escape(base_url + content.get_absolute_url())
+        yield f"<item><title>{escape(content.title)}</title><link>{link}</link>"
+        yield f'<guid isPermaLink="true">{link}</guid><pubDate>{rfc2822_date(content.created_at)}</pubDate>'
+        yield f"<description>{escape(content.meta_description)}</description>"
+        if content.thumbnail:
+            mime, length = _enclosure(content.thumbnail)
+            url = quoteattr(_media_url(base_url, content.thumbnail))
+            yield f'<enclosure url={url} type="{mime}" length="{length}"/>'
+        yield "</item>\n"
+    yield "</channel></rss>\n"
+
+
+def atom_xml(ctype, label, base_url):
+    list_url = quoteattr(f"{base_url}{reverse('content_list')}?type={ctype}")
+    self_url = base_url + reverse("content_feed", args=[ctype, "atom"])
+    latest = Content.objects.filter(content_type=ctype).aggregate(latest=Max("created_at"))["latest"]
+    yield XML_HEADER
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f"<title>{escape(label)} - Health Takeaways</title><id>{escape(self_url)}</id>"
+    yield f'<link href={list_url}/><link rel="self" href={quoteattr(self_url)}/>'
+    yield f"<updated>{rfc3339_date(latest or datetime.now(timezone.utc))}</updated>\n"
+    for content in feed_items(ctype):
+        link = base_url + content.get_absolute_url()
+        yield f"<entry><title>{escape(content.title)}</title><id>{escape(link)}</id>"
+        yield f"<link href={quoteattr(link)}/><updated>{rfc3339_date(content.created_at)}</updated>"
+        yield f"<summary>{escape(content.meta_description)}</summary>"
+        if content.thumbnail:
+            mime, length = _enclosure(content.thumbnail)
+            url = quoteattr(_media_url(base_url, content.thumbnail))
+            yield f'<link rel="enclosure" href={url} type="{mime}" length="{length}"/>'
+        yield "</entry>\n"
+    yield "</feed>\n"
+
+
+@require_GET
+@condition(etag_func=generation_etag, last_modified_func=generation_modified)
+def content_feed(request, ctype, fmt):
+    label = dict(Content.CONTENT_TYPES).get(ctype)
+    if label is None or fmt not in FEED_FORMATS:
+        raise Http404("No such feed")
+    build = rss_xml if fmt == "rss" else atom_xml
+    body = cached_stream(request, f"feed-{ctype}.{fmt}", lambda base_url: build(ctype, label, base_url))
+    return streaming(body, FEED_FORMATS[fmt])
@@ -0,0 +1,295 @@
+# core/jobs.py
+"""
+Durable background jobs stored in the database, for work that should not
+run inside a blogger request.
+
+    @jobs.register("prerender.refresh", batch_size=50)
+    def refresh(payloads): ...
+
+    jobs.enqueue("prerender.refresh", {"pks": [42]}, key="prerender:42")
+
+Handlers live in each app's tasks.py and are loaded by `manage.py
+run_worker`. A job row is inserted in the caller's transaction, so it
+exists exactly when the change that needs it was committed.
+
+Claiming is a conditional UPDATE (queued -> running) tagged with a
+per-claim token, which is safe with several workers on any backend. For
+kinds registered with batch_size > 1, one claim takes up to that many
+due jobs of the same kind and the handler gets their payloads as a list.
+Failed jobs are retried with exponential backoff until max_attempts;
+jobs whose worker died are requeued after JOBS_TIMEOUT. Handlers must be
+idempotent, since a job can run more than once.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 10       # seconds before the first retry
+BACKOFF_MAX = 60 * 60   # cap between retries
+ERROR_LIMIT = 4000      # characters of traceback kept on the row
+
+
+# ---------- Registry and enqueueing ----------
+
+class Handler:
+    def __init__(self, kind, func, batch_size=1):
+        self.kind = kind
+        self.func = func
+        self.batch_size = batch_size
+
+    def __call__(self, jobs):
+        if self.batch_size > 1:
+            return self.func([job.payload for job in jobs])
+        return self.func(jobs[0].payload)
+
+
+registry = {}
+
+
+def register(kind, batch_size=1):
+    """
+    Decorator registering the handler for `kind`. It is called with one
+    payload, or with a list of up to `batch_size` payloads when batching.
+    """
+    def decorator(func):
+        registry[kind] = Handler(kind, func, batch_size)
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, key=None, delay=0, max_attempts=5):
+    """
+    Queue a job. With `key`, nothing is added while a job with the same key
+    is still queued; that job is returned instead (None if it started
+    in the meantime).
+    """
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        idempotency_key=key,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts,
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return Job.objects.filter(idempotency_key=key, status=Job.QUEUED).first()
+    return job
+
+
+# ---------- Claiming and running ----------
+
+def claim(worker_id, kinds):
+    """
+    Claim the oldest due job of one of `kinds` and, if that kind batches,
+    more due jobs of the same kind. Returns the claimed jobs (maybe none).
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now, kind__in=kinds)
+    first = due.order_by("run_after", "id").values_list("kind", flat=True).first()
+    if first is None:
+        return []
+    ids = list(
+        due.filter(kind=first)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:registry[first].batch_size]
+    )
+    token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+    Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_by=token, started_at=now, attempts=F("attempts") + 1,
+    )
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING).order_by("id"))
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`, doubling each time, with jitter."""
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+
+
+def retry_or_fail(job, error):
+    now = timezone.now()
+    # Matching on locked_by makes this a no-op if the job was requeued meanwhile.
+    claimed = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING)
+    error = error[-ERROR_LIMIT:]
+    if job.attempts >= job.max_attempts:
+        claimed.update(status=Job.FAILED, finished_at=now, locked_by="", last_error=error)
+        return
+    try:
+        with transaction.atomic():
+            claimed.update(
+                status=Job.QUEUED, locked_by="", last_error=error,
+                run_after=now + timedelta(seconds=backoff(job.attempts)),
+            )
+    except IntegrityError:
+        # A newer job with the same key is already queued and will redo this work.
+        claimed.update(
+            status=Job.DONE, finished_at=now, locked_by="",
+            last_error=f"Superseded by a newer queued job after:\n{error}",
+        )
+
+
+def run_jobs(jobs):
+    """Run one claimed batch (all of the same kind) and record the outcome."""
+    handler = registry[jobs[0].kind]
+    try:
+        handler(jobs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s failed (ids %s)", handler.kind, [job.pk for job in jobs])
+        for job in jobs:
+            retry_or_fail(job, error)
+    else:
+        Job.objects.filter(
+            pk__in=[job.pk for job in jobs], locked_by=jobs[0].locked_by, status=Job.RUNNING,
+        ).update(status=Job.DONE, finished_at=timezone.now(), locked_by="", last_error="")
+    finally:
+        connection.close()  # each pool thread has its own connection
+
+
+def requeue_stale(timeout):
+    """Retry (or fail) jobs that have been running longer than `timeout` seconds."""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = list(Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff))
+    for job in stale:
+        retry_or_fail(job, f"No result after {timeout}s; the worker probably died.")
+    return len(stale)
+
+
+def purge(days):
+    """Delete jobs that finished successfully more than `days` days ago."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+# ---------- Metrics ----------
+
+def queue_stats(window=timedelta(hours=1)):
+    """
+    Per kind: current depth (queued/running, age of the oldest queued job)
+    and, over the last `window`, jobs done/failed with their latency
+    (enqueue -> finish) and run time (start -> finish), in seconds.
+    """
+    now = timezone.now()
+    stats = {}
+
+    def entry(kind):
+        return stats.setdefault(kind, {
+            "queued": 0, "running": 0, "oldest_queued_s": None,
+            "done": 0, "failed": 0,
+            "latency_avg_s": None, "latency_max_s": None, "run_avg_s": None,
+        })
+
+    pending = (
+        Job.objects.filter(status__in=[Job.QUEUED, Job.RUNNING])
+        .values("kind", "status")
+        .annotate(n=Count("id"), oldest=Min("created_at"))
+        .order_by()
+    )
+    for row in pending:
+        item = entry(row["kind"])
+        item[row["status"]] = row["n"]
+        if row["status"] == Job.QUEUED:
+            item["oldest_queued_s"] = round((now - row["oldest"]).total_seconds(), 1)
+
+    latency = ExpressionWrapper(F("finished_at") - F("created_at"), output_field=DurationField())
+    run_time = ExpressionWrapper(F("finished_at") - F("started_at"), output_field=DurationField())
+    finished = (
+        Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__gte=now - window)
+        .values("kind")
+        .annotate(
+            done=Count("id", filter=Q(status=Job.DONE)),
+            failed=Count("id", filter=Q(status=Job.FAILED)),
+            latency_avg=Avg(latency), latency_max=Max(latency), run_avg=Avg(run_time),
+        )
+        .order_by()
+    )
+    for row in finished:
+        item = entry(row["kind"])
+        item["done"], item["failed"] = row["done"], row["failed"]
+        for name in ("latency_avg", "latency_max", "run_avg"):
+            if row[name] is not None:
+                item[f"{name}_s"] = round(row[name].total_seconds(), 3)
+    return stats
+
+
+# ---------- Worker ----------
+
+class Worker:
+    """
+    Polls for due jobs and runs them on a thread pool of `concurrency`
+    threads. Housekeeping (stale requeue, purge, stats log) runs every
+    `housekeeping_interval` seconds.
+    """
+    def __init__(self, concurrency=4, poll_interval=1.0, timeout=600,
+                 retention_days=7, housekeeping_interval=60):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.retention_days = retention_days
+        self.housekeeping_interval = housekeeping_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.processed = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def housekeeping(self):
+        close_old_connections()
+        requeued = requeue_stale(self.timeout)
+        purged = purge(self.retention_days)
+        if requeued or purged:
+            logger.info("Requeued %d stale job(s), purged %d finished job(s)", requeued, purged)
+        for kind, item in sorted(queue_stats().items()):
+            logger.info("queue %s: %s", kind, item)
+
+    def run(self, once=False):
+        """Process jobs until stop() is called, or with `once` until nothing is due."""
+        kinds = list(registry)
+        inflight = set()
+        next_housekeeping = 0.0
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job") as pool:
+            while not self._stop.is_set():
+                if time.monotonic() >= next_housekeeping:
+                    self.housekeeping()
+                    next_housekeeping = time.monotonic() + self.housekeeping_interval
+
+                inflight = {future for future in inflight if not future.done()}
+                claimed = False
+                while len(inflight) < self.concurrency and not self._stop.is_set():
+                    jobs = claim(self.worker_id, kinds)
+                    if not jobs:
+                        break
+                    claimed = True
+                    self.processed += len(jobs)
+                    inflight.add(pool.submit(run_jobs, jobs))
+
+                if claimed:
+                    continue
+                if once and not inflight:
+                    break
+                if inflight:
+                    wait(inflight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    self._stop.wait(self.poll_interval)
+        return self.processed
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.caching import bump_content_generation
+from core.models import Content
+
+
+class Command(BaseCommand):
+    help = "Compute word count, reading time, meta description and body HTML for existing content."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--missing-only", action="store_true",
+            help="Only rows with an excerpt or body that has not been processed yet.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        qs = Content.objects.only("pk", "excerpt", "body").order_by("pk")
+        if options["missing_only"]:
+            has_body = Q(body__isnull=False) & ~Q(body="")
+            has_excerpt = Q(excerpt__isnull=False) & ~Q(excerpt="")
+            qs = qs.filter(
+                (has_body & Q(word_count=0)) | ((has_body | has_excerpt) & Q(meta_description=""))
+            )
+
+        updated = 0
+        last_pk = 0
+        while True:
+            # Keyset batches: constant cost per batch however large the table is.
+            batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for obj in batch:
+                obj.update_derived_fields()
+            Content.objects.bulk_update(batch, Content.DERIVED_FIELDS)
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"  {updated} row(s)...")
+
+        if updated:
+            bump_content_generation()  # bulk_update sends no signals
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} row(s)."))
@@ -0,0 +1,51 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from core.models import Content
+
+
+class Command(BaseCommand):
+    help = "Benchmark the JSON content API against the equivalent HTML views."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Requests per URL (default 50).")
+        parser.add_argument("--type", default="article", help="Content type filter to use for the list pair.")
+
+    def measure(self, client, url, n, **headers):
+        client.get(url, **headers)  # first hit populates caches; not timed
+        timings = []
+        size = 0
+        for _ in range(n):
+            start = time.perf_counter()
+            response = client.get(url, **headers)
+            timings.append((time.perf_counter() - start) * 1000)
+            size = len(response.content)
+        return statistics.median(timings), max(timings), size
+
+    def handle(self, *args, **options):
+        host = next((h for h in settings.ALLOWED_HOSTS if not h.startswith((".", "*"))), "localhost")
+        client = Client(HTTP_HOST=host)
+        n = options["requests"]
+        ctype = options["type"]
+
+        pairs = [
+            ("list", f"/content/?type={ctype}", f"/api/content/?type={ctype}&limit=12"),
+        ]
+        pk = Content.objects.filter(content_type=ctype).values_list("pk", flat=True).first()
+        if pk:
+            pairs.append(("detail", f"/content/{pk}/", f"/api/content/{pk}/"))
+
+        self.stdout.write(f"{'':10}{'url':40}{'p50 ms':>10}{'max ms':>10}{'bytes':>10}")
+        for label, html_url, api_url in pairs:
+            rows = [
+                ("html", html_url, self.measure(client, html_url, n)),
+                ("api", api_url, self.measure(client, api_url, n)),
+                ("api+gz", api_url, self.measure(client, api_url, n, HTTP_ACCEPT_ENCODING="gzip")),
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name, url, (p50, worst, size) in rows:
+                self.stdout.write(f"  {name:8}{url:40}{p50:10.2f}{worst:10.2f}{size:10}")
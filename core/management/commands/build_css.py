@@ -0,0 +1,255 @@
+import json
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Keep in sync with the inline tailwind.config in templates/base.html (CDN mode).
+TAILWIND_THEME = {
+    "extend": {
+        "colors": {
+            "health-primary": "#059669",
+            "health-secondary": "#34d399",
+            "health-accent": "#f0fdf4",
+            "health-dark": "#064e3b",
+        },
+        "fontFamily": {
+            "sans": ["Inter", "ui-sans-serif", "system-ui"],
+        },
+    },
+}
+
+INPUT_CSS = """\
+@tailwind base;
+@tailwind components;
+@tailwind utilities;
+"""
+
+INTER_FONT_FACE = """\
+@font-face {
+  font-family: "Inter";
+  font-style: normal;
+  font-weight: 300 700;
+  font-display: swap;
+  src: url("fonts/%s") format("woff2");
+}
+"""
+
+CLASS_ATTR_RE = re.compile(r"""class\s*[=:]\s*(?:"([^"]*)"|'([^']*)')""")
+ICON_RE = re.compile(r"\bfa-[a-z0-9]+(?:-[a-z0-9]+)*")
+TEMPLATE_TAG_RE = re.compile(r"{%.*?%}|{{.*?}}", re.S)
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+URL_RE = re.compile(r"""url\(\s*["']?([^"')]+)["']?\s*\)""")
+# A rule is an icon glyph when every selector is `.fa-<name>` (optionally
+# ::before) and its only declarations set the glyph (`content` up to 6.4,
+# `--fa` from 6.5 on).
+ICON_SELECTOR_RE = re.compile(r"^\.(fa-[a-z0-9-]+)(?:::?before)?$")
+GLYPH_BLOCK_RE = re.compile(r"""^\{\s*(?:(?:content|--fa(?:--fa)?)\s*:\s*"[^"]*"\s*;?\s*)+\}$""")
+CODEPOINT_RE = re.compile(r"\\([0-9a-fA-F]{2,6})")
+FONT_SRC_RE = re.compile(r"src:\s*([^;}]+)")
+
+
+def source_files():
+    """Files whose text can contain utility classes or icon names."""
+    files = sorted(Path(settings.BASE_DIR, "templates").rglob("*.html"))
+    files += [Path(settings.BASE_DIR, path) for path in ("blogger/forms.py", "core/forms.py")]
+    return [path for path in files if path.exists()]
+
+
+def scan_sources(paths):
+    """Return (utility classes, icon names) used in `paths`."""
+    classes, icons = set(), set()
+    for path in paths:
+        text = path.read_text(encoding="utf-8")
+        icons.update(ICON_RE.findall(text))
+        if path.suffix == ".py":
+            # Widget attrs are built from module-level strings, so take every literal.
+            literals = re.findall(r"""["']([^"'\n]*)["']""", text)
+        else:
+            literals = [a or b for a, b in CLASS_ATTR_RE.findall(text)]
+        for literal in literals:
+            classes.update(TEMPLATE_TAG_RE.sub(" ", literal).split())
+    return classes, icons
+
+
+def split_rules(css):
+    """Split a stylesheet into top-level (prelude, block) pairs; at-rule blocks stay whole."""
+    css = COMMENT_RE.sub("", css)
+    rules, depth, start, opened = [], 0, 0, 0
+    for i, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                opened = i
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                prelude = css[start:opened].strip()
+                if ";" in prelude:  # e.g. a leading @charset/@import statement
+                    statements, prelude = prelude.rsplit(";", 1)
+                    rules.append((statements.strip() + ";", ""))
+                    prelude = prelude.strip()
+                rules.append((prelude, css[opened:i + 1].strip()))
+                start = i + 1
+    return rules
+
+
+def subset_icons(css, used):
+    """
+    Drop glyph rules for icons not in `used`. Everything else (base
+    classes, @font-face, animations, modifiers) is kept as is.
+    Returns (css, codepoints of the kept glyphs).
+    """
+    out, codepoints = [], set()
+    for prelude, block in split_rules(css):
+        selectors = [s.strip() for s in prelude.split(",")]
+        matches = [ICON_SELECTOR_RE.match(s) for s in selectors]
+        if block and all(matches) and GLYPH_BLOCK_RE.match(block):
+            kept = [s for s, m in zip(selectors, matches) if m.group(1) in used]
+            if not kept:
+                continue
+            prelude = ",".join(kept)
+            codepoints.update(int(cp, 16) for cp in CODEPOINT_RE.findall(block))
+        out.append(prelude + re.sub(r"\s+", " ", block))
+    return "\n".join(out) + "\n", codepoints
+
+
+def woff2_only(css):
+    """Every browser we target reads woff2; drop the ttf/woff fallbacks from @font-face."""
+    def keep(match):
+        sources = [s.strip() for s in match.group(1).split(",")]
+        woff2 = [s for s in sources if ".woff2" in s]
+        return "src: " + ", ".join(woff2 or sources)
+    return FONT_SRC_RE.sub(keep, css)
+
+
+def subset_font(source, target, codepoints):
+    """
+    Copy a webfont, keeping only the used glyphs when fontTools is
+    installed. Returns True when the font was subset.
+    """
+    try:
+        from fontTools import subset
+    except ImportError:  # optional: ship the whole font file
+        shutil.copyfile(source, target)
+        return False
+    options = subset.Options()
+    options.flavor = source.suffix.lstrip(".") if source.suffix in (".woff", ".woff2") else None
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, str(target), options)
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the self-hosted CSS bundle used when CSS_BUNDLE is on: a purged "
+        "Tailwind build (site.css) and a Font Awesome subset with only the icons "
+        "the templates use (icons.css), written to CSS_BUILD_DIR. Run before "
+        "collectstatic, which adds the content hashes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-tailwind", action="store_true",
+            help="Only rebuild the icon subset.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        out_dir = Path(settings.CSS_BUILD_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        sources = source_files()
+        classes, icons = scan_sources(sources)
+        self.stdout.write(
+            f"Scanned {len(sources)} files: {len(classes)} class names, {len(icons)} icons."
+        )
+
+        if not options["skip_tailwind"]:
+            self.build_tailwind(sources, out_dir)
+        self.build_icons(icons, out_dir)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"CSS bundle written to {out_dir} in {time.monotonic() - started:.1f}s. "
+            "Run collectstatic to publish it."
+        ))
+
+    def build_tailwind(self, sources, out_dir):
+        command = shlex.split(settings.TAILWIND_CLI)
+        if not command or shutil.which(command[0]) is None:
+            raise CommandError(
+                f"Tailwind CLI not found ({settings.TAILWIND_CLI!r}). Install the v3 "
+                "standalone binary or set TAILWIND_CLI, e.g. 'npx tailwindcss@3'."
+            )
+
+        input_css = INPUT_CSS
+        inter = settings.INTER_FONT_FILE and Path(settings.INTER_FONT_FILE)
+        if inter and inter.exists():
+            (out_dir / "fonts").mkdir(exist_ok=True)
+            shutil.copyfile(inter, out_dir / "fonts" / inter.name)
+            input_css = INTER_FONT_FACE % inter.name + input_css
+        else:
+            self.stderr.write(
+                f"Inter font not found at {settings.INTER_FONT_FILE}; the bundle "
+                "falls back to the system sans-serif font."
+            )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp, "tailwind.config.js")
+            config.write_text(
+                "module.exports = "
+                + json.dumps({"content": [str(p) for p in sources], "theme": TAILWIND_THEME}, indent=2)
+                + ";\n"
+            )
+            input_path = Path(tmp, "input.css")
+            input_path.write_text(input_css)
+            target = out_dir / "site.css"
+            result = subprocess.run(
+                command + ["-c", str(config), "-i", str(input_path), "-o", str(target), "--minify"],
+                capture_output=True, text=True,
+            )
+        if result.returncode:
+            raise CommandError(f"Tailwind build failed:\n{result.stderr.strip()}")
+        self.stdout.write(f"  site.css   {target.stat().st_size / 1024:.1f} KiB")
+
+    def build_icons(self, icons, out_dir):
+        fa_dir = settings.FONT_AWESOME_DIR and Path(settings.FONT_AWESOME_DIR)
+        source = fa_dir and fa_dir / "css" / "all.css"
+        if not source or not source.exists():
+            raise CommandError(
+                f"Font Awesome not found at {settings.FONT_AWESOME_DIR}. Unpack the "
+                "fontawesome-free web download there (it must contain css/all.css)."
+            )
+
+        css, codepoints = subset_icons(source.read_text(encoding="utf-8"), icons)
+        css = woff2_only(css)
+        missing = icons - set(re.findall(r"\.(fa-[a-z0-9-]+)", css))
+        if missing:
+            self.stderr.write(f"Not defined by Font Awesome (ignored): {', '.join(sorted(missing))}")
+
+        # Fonts move next to the stylesheet: ../webfonts/x -> webfonts/x.
+        (out_dir / "webfonts").mkdir(exist_ok=True)
+        subset_count = 0
+        for ref in sorted(set(URL_RE.findall(css))):
+            font = (source.parent / ref).resolve()
+            if not font.exists():
+                raise CommandError(f"{source} references a missing font: {ref}")
+            subset_count += subset_font(font, out_dir / "webfonts" / font.name, codepoints)
+            css = css.replace(ref, f"webfonts/{font.name}")
+
+        target = out_dir / "icons.css"
+        target.write_text(css, encoding="utf-8")
+        fonts = "subset" if subset_count else "copied whole (install fonttools to subset them)"
+        self.stdout.write(
+            f"  icons.css  {target.stat().st_size / 1024:.1f} KiB, "
+            f"{len(codepoints)} glyphs; webfonts {fonts}"
+        )
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import prerender
+from core.models import Content
+
+LOCAL_HOSTS = {"", None, "localhost", "127.0.0.1"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the public pages (home, every content list page per type, "
+        "every content detail page) to static HTML under PRERENDER_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Size of the render process pool (default: CPU count).",
+        )
+        parser.add_argument(
+            "--content", type=int, action="append", default=[], metavar="PK",
+            help="Incremental mode: only re-render pages affected by this content (repeatable).",
+        )
+        parser.add_argument(
+            "--edit", action="store_true",
+            help="With --content: the change was an in-place edit, not a create/delete.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.PRERENDER_ROOT:
+            raise CommandError("PRERENDER_ROOT is not configured.")
+        # Pages are rendered without a real request, so share and og:url
+        # links get their host from PRERENDER_HOST.
+        if not settings.DEBUG and settings.PRERENDER_HOST in LOCAL_HOSTS:
+            raise CommandError(
+                f"PRERENDER_HOST is {settings.PRERENDER_HOST!r}; set it to the public "
+                "host name so the static pages link to the live site."
+            )
+
+        started = time.monotonic()
+        structural = not options["edit"]
+        if options["content"]:
+            types = dict(
+                Content.objects.filter(pk__in=options["content"]).values_list("pk", "content_type")
+            )
+            pages = set()
+            for pk in options["content"]:
+                pages |= prerender.pages_for_content(pk, [types.get(pk)], structural)
+        else:
+            pages = prerender.all_pages()
+
+        counts = prerender.render_pages(pages, workers=options["workers"])
+        removed = counts[prerender.REMOVED]
+        if structural:
+            removed += prerender.prune_list_pages()
+
+        summary = (
+            f"Rendered {counts[prerender.WRITTEN]} page(s), removed {removed}, "
+            f"failed {counts[prerender.FAILED]}, "
+            f"in {time.monotonic() - started:.2f}s -> {settings.PRERENDER_ROOT}"
+        )
+        if counts[prerender.FAILED]:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = "Summarize request profiles written by SamplingProfilerMiddleware, per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--view", help="Only show this view name.")
+        parser.add_argument("--top", type=int, default=5, help="Top functions to list per view.")
+
+    def handle(self, *args, **options):
+        by_view = defaultdict(list)
+        for record in profiling.load_dumps():
+            if options["view"] and record["view"] != options["view"]:
+                continue
+            by_view[record["view"]].append(record)
+
+        if not by_view:
+            self.stdout.write(f"No profiles in {profiling.profile_dir()}.")
+            return
+
+        # Slowest views (by p95) first
+        ranked = sorted(
+            by_view.items(),
+            key=lambda item: percentile([r["elapsed_ms"] for r in item[1]], 95),
+            reverse=True,
+        )
+        for view, records in ranked:
+            n = len(records)
+            elapsed = [r["elapsed_ms"] for r in records]
+            avg = lambda key: sum(r["phases"][key] for r in records) / n
+            self.stdout.write(self.style.MIGRATE_HEADING(view))
+            self.stdout.write(
+                f"  profiles={n}  p50={percentile(elapsed, 50):.1f}ms  "
+                f"p95={percentile(elapsed, 95):.1f}ms  max={max(elapsed):.1f}ms  "
+                f"queries/req={sum(r['queries'] for r in records) / n:.1f}"
+            )
+            self.stdout.write(
+                f"  avg db={avg('db'):.1f}ms  template={avg('template'):.1f}ms  view={avg('view'):.1f}ms"
+            )
+            functions = defaultdict(float)
+            for record in records:
+                for label, ms in record["top_functions"]:
+                    functions[label] += ms
+            for label, ms in sorted(functions.items(), key=lambda kv: kv[1], reverse=True)[:options["top"]]:
+                self.stdout.write(f"    {ms / n:8.2f}ms/req  {label}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core import analytics
+
+
+class Command(BaseCommand):
+    help = "Fold closed analytics log segments into per-content daily stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--include-current", action="store_true",
+            help="Also roll up the segment for the current hour (dev/testing only).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            segments, rows = analytics.rollup(include_current=options["include_current"])
+        except analytics.RollupInProgress:
+            self.stdout.write(self.style.WARNING("Another rollup is running; nothing done."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {segments} segment(s) into {rows} daily stats row(s)."
+        ))
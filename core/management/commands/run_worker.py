@@ -0,0 +1,70 @@
+import json
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the database queue (see core/jobs.py) on a "
+        "thread pool, with retries and backoff. Stops cleanly on SIGINT/SIGTERM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=settings.JOBS_CONCURRENCY,
+            help="Worker threads (default: JOBS_CONCURRENCY).",
+        )
+        parser.add_argument(
+            "--poll", type=float, default=settings.JOBS_POLL_INTERVAL,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--stats", action="store_true",
+            help="Print queue depth and latency per job kind as JSON and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(jobs.queue_stats(), indent=2))
+            return
+
+        autodiscover_modules("tasks")
+        if not jobs.registry:
+            raise CommandError("No job handlers registered (expected in <app>/tasks.py).")
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        if options["verbosity"] > 1:
+            # Per-kind queue stats and housekeeping are logged at INFO.
+            logger = logging.getLogger("core.jobs")
+            logger.setLevel(logging.INFO)
+            logger.addHandler(logging.StreamHandler())
+        worker = jobs.Worker(
+            concurrency=options["concurrency"],
+            poll_interval=options["poll"],
+            timeout=settings.JOBS_TIMEOUT,
+            retention_days=settings.JOBS_RETENTION_DAYS,
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        self.stdout.write(
+            f"Worker {worker.worker_id}: {options['concurrency']} thread(s), "
+            f"kinds: {', '.join(sorted(jobs.registry))}"
+        )
+        started = time.monotonic()
+        processed = worker.run(once=options["once"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} job(s) in {time.monotonic() - started:.1f}s."
+        ))
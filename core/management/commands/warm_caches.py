@@ -0,0 +1,78 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from core import caching, prerender
+from core.models import Content
+from core.views import WARMUP_ENVIRON_KEY
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm caches after a deploy by requesting the hottest URLs (home, content "
+        "lists per type, most-viewed detail pages) through the WSGI application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=1, help="List pages to warm per type (default 1).")
+        parser.add_argument("--top", type=int, default=50, help="Most-viewed detail pages to warm (default 50).")
+        parser.add_argument("--concurrency", type=int, default=8, help="Worker threads (default 8).")
+        parser.add_argument("--host", default=None, help="Host header to send (default: first ALLOWED_HOSTS entry).")
+
+    def hot_urls(self, pages, top):
+        urls = ["/"]
+        for ctype in [""] + prerender.LIST_TYPES:
+            last = min(pages, prerender.list_page_count(ctype))
+            urls.extend(prerender.page_url(("list", ctype, n)) for n in range(1, last + 1))
+        hottest = Content.objects.order_by("-view_count").values_list("pk", flat=True)[:top]
+        urls.extend(prerender.page_url(("detail", pk)) for pk in hottest)
+        return urls
+
+    def handle(self, *args, **options):
+        host = options["host"] or next(
+            (h for h in settings.ALLOWED_HOSTS if h and not h.startswith((".", "*"))), "localhost"
+        )
+        application = import_string(settings.WSGI_APPLICATION)
+
+        def fetch(url):
+            parts = urlsplit(url)
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": parts.path,
+                "QUERY_STRING": parts.query,
+                "HTTP_HOST": host,
+                "wsgi.input": io.BytesIO(),
+                WARMUP_ENVIRON_KEY: True,
+            }
+            setup_testing_defaults(environ)
+            status = []
+            body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+            return url, status[0] if status else "no response"
+
+        urls = self.hot_urls(options["pages"], options["top"])
+        misses_before = caching.stats["misses"]
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(fetch, urls))
+        elapsed = time.monotonic() - started
+
+        failed = [(url, status) for url, status in results if not status.startswith("200")]
+        for url, status in failed:
+            self.stderr.write(f"  {status}  {url}")
+        summary = (
+            f"Warmed {len(urls) - len(failed)}/{len(urls)} URL(s) in {elapsed:.2f}s, "
+            f"populated {caching.stats['misses'] - misses_before} cache entr(ies)."
+        )
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
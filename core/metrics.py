@@ -0,0 +1,155 @@
+# core/metrics.py
+"""
+Site metrics that come from slow external services.
+
+Page renders only ever read the cache. When the cached value is older
+than its freshness window it is still served, and a single background
+refresh is started (single-flighted per process with a flag and across
+processes with a cache lock). Nothing on the request path waits on the
+upstream call; before the first successful fetch the configured default
+is shown.
+"""
+import json
+import logging
+import threading
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# ---------- Sources ----------
+
+class SubscriberSource:
+    """Where the subscriber count comes from. Subclasses implement fetch()."""
+    def fetch(self):
+        raise NotImplementedError
+
+
+class WhatsAppSubscriberSource(SubscriberSource):
+    """
+    Reads the count from a JSON endpoint, e.g. {"subscriber_count": 1234}.
+    Configure with SUBSCRIBER_SOURCE_OPTIONS = {"url": ..., "token": ...}.
+    """
+    def __init__(self, url, token=None, field="subscriber_count", timeout=5.0):
+        self.url = url
+        self.token = token
+        self.field = field
+        self.timeout = timeout
+
+    def fetch(self):
+        request = urllib.request.Request(self.url, headers={"Accept": "application/json"})
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return int(json.load(response)[self.field])
+
+
+class FakeSubscriberSource(SubscriberSource):
+    """
+    Local stand-in for development and tests: returns `count` after
+    `delay` seconds, or raises when `fail` is set. `calls` counts fetches.
+    """
+    def __init__(self, count=1200, delay=0.0, fail=False):
+        self.count = count
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("fake subscriber source failure")
+        return self.count
+
+
+# ---------- Stale-while-revalidate cache ----------
+
+class StaleWhileRevalidate:
+    """
+    Caches `fetch()` under `key` as (value, fetched_at). Values older than
+    `fresh_for` seconds are served while a background refresh runs; values
+    older than `max_stale` seconds are dropped and `default` is served.
+    """
+    def __init__(self, key, fetch, fresh_for, max_stale, default=None, lock_timeout=60):
+        self.key = key
+        self.lock_key = f"{key}:refreshing"
+        self.fetch = fetch
+        self.fresh_for = fresh_for
+        self.max_stale = max_stale
+        self.default = default
+        self.lock_timeout = lock_timeout
+        self._inflight = False
+        self._inflight_lock = threading.Lock()
+
+    def get(self):
+        entry = cache.get(self.key)
+        if entry is None:
+            self.refresh_in_background()
+            return self.default
+        value, fetched_at = entry
+        if time.time() - fetched_at > self.fresh_for:
+            self.refresh_in_background()
+        return value
+
+    def refresh_in_background(self):
+        """Start a refresh unless one is already running here or in another process."""
+        with self._inflight_lock:
+            if self._inflight:
+                return False
+            self._inflight = True
+        if not cache.add(self.lock_key, True, self.lock_timeout):
+            self._inflight = False
+            return False
+        thread = threading.Thread(target=self._refresh_and_release, name=f"swr:{self.key}", daemon=True)
+        thread.start()
+        return thread
+
+    def refresh(self):
+        """Fetch now and store the result. Raises whatever the source raises."""
+        value = self.fetch()
+        cache.set(self.key, (value, time.time()), self.max_stale)
+        return value
+
+    def _refresh_and_release(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving the stale value; the next read after the lock expires retries.
+            logger.exception("Background refresh of %s failed", self.key)
+            return
+        finally:
+            self._inflight = False
+        cache.delete(self.lock_key)
+
+
+_subscribers = None
+_subscribers_lock = threading.Lock()
+
+
+def get_subscriber_metric():
+    global _subscribers
+    if _subscribers is None:
+        with _subscribers_lock:
+            if _subscribers is None:
+                source_class = import_string(settings.SUBSCRIBER_SOURCE)
+                source = source_class(**settings.SUBSCRIBER_SOURCE_OPTIONS)
+                _subscribers = StaleWhileRevalidate(
+                    "metrics:subscriber_count",
+                    source.fetch,
+                    fresh_for=settings.SUBSCRIBER_FRESH_SECONDS,
+                    max_stale=settings.SUBSCRIBER_MAX_STALE_SECONDS,
+                    default=settings.SUBSCRIBER_COUNT_DEFAULT,
+                )
+    return _subscribers
+
+
+def subscriber_count():
+    """Subscriber count for display; never blocks on the upstream API."""
+    return get_subscriber_metric().get()
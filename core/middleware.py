@@ -0,0 +1,82 @@
+# core/middleware.py
+import cProfile
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfilerMiddleware:
+    """
+    Opt-in production profiler (PROFILING_ENABLED). Profiles a random
+    PROFILING_SAMPLE_RATE of requests with cProfile, and keeps a cheap
+    stack-sampled profile of any request slower than PROFILING_SLOW_MS.
+    See core/profiling.py for the dump format.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.slow_seconds = settings.PROFILING_SLOW_MS / 1000
+
+    def __call__(self, request):
+        sampled = random.random() < self.sample_rate
+        profiler = cProfile.Profile() if sampled else None
+        timer = profiling.QueryTimer()
+        sampler = profiling.get_sampler()
+        ident = threading.get_ident()
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            sampler.watch(ident)
+            start = time.perf_counter()
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    profiler = None  # another profiler is already active on this thread
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                elapsed = time.perf_counter() - start
+                samples = sampler.unwatch(ident)
+
+        if profiler is not None or elapsed >= self.slow_seconds:
+            try:
+                self._dump(request, response, elapsed, timer, samples, profiler)
+            except Exception:
+                logger.exception("Could not write request profile")
+        return response
+
+    def _dump(self, request, response, elapsed, timer, samples, profiler):
+        match = getattr(request, "resolver_match", None)
+        if profiler is not None:
+            top = profiling.top_from_profile(profiler)
+        else:
+            top = profiling.top_from_samples(samples, elapsed)
+        profiling.dump({
+            "timestamp": time.time(),
+            "view": match.view_name if match else request.path,
+            "path": request.get_full_path(),
+            "method": request.method,
+            "status": response.status_code,
+            "reason": "sampled" if profiler is not None else "slow",
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "queries": timer.count,
+            "phases": profiling.phase_breakdown(elapsed, timer.seconds, samples),
+            "samples": len(samples),
+            "top_functions": top,
+        }, profiler=profiler)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_content_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['-created_at', '-id'], name='content_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['content_type', '-created_at', '-id'], name='content_type_recent_idx'),
+        ),
+    ]
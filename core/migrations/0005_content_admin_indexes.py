@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_content_derived_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['is_featured', '-created_at'], name='content_featured_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['title'], name='content_title_idx'),
+        ),
+    ]
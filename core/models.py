@@ -1,5 +1,10 @@
 from django.db import models
 from django.urls import reverse
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+WORDS_PER_MINUTE = 200
+META_DESCRIPTION_WORDS = 30
 
 class Content(models.Model):
     CONTENT_TYPES = [
@@ -21,8 +26,27 @@ class Content(models.Model):
     view_count = models.PositiveIntegerField(default=0)
     is_featured = models.BooleanField(default=False)
 
+    # Derived from excerpt/body on save (see update_derived_fields) so the
+    # detail page does not re-process the whole body on every render.
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_minutes = models.PositiveSmallIntegerField(default=1, editable=False)
+    meta_description = models.TextField(blank=True, default="", editable=False)
+    body_html = models.TextField(blank=True, default="", editable=False)
+
+    DERIVED_FIELDS = ["word_count", "reading_minutes", "meta_description", "body_html"]
+    DERIVED_SOURCE_FIELDS = {"excerpt", "body"}
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Listing/API order and cursor pagination, with and without a type filter
+            models.Index(fields=["-created_at", "-id"], name="content_recent_idx"),
+            models.Index(fields=["content_type", "-created_at", "-id"], name="content_type_recent_idx"),
+            # Featured strip on home and the admin filter
+            models.Index(fields=["is_featured", "-created_at"], name="content_featured_recent_idx"),
+            # Admin title search (prefix range scans)
+            models.Index(fields=["title"], name="content_title_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.content_type})"
@@ -30,6 +54,29 @@ class Content(models.Model):
     def get_absolute_url(self):
         return reverse("content_detail", args=[str(self.id)])
 
+    def update_derived_fields(self):
+        """
+        Same results the detail template used to compute per render:
+        `wordcount`, `widthratio words 200 1`, `truncatewords:30` and an
+        escaped `linebreaks` of the body.
+        """
+        body = self.body or ""
+        self.word_count = len(body.split())
+        self.reading_minutes = max(1, round(self.word_count / WORDS_PER_MINUTE))
+        self.meta_description = Truncator(self.excerpt or body).words(
+            META_DESCRIPTION_WORDS, truncate=" …"
+        )
+        self.body_html = linebreaks(body, autoescape=True) if body else ""
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.update_derived_fields()
+        elif self.DERIVED_SOURCE_FIELDS & set(update_fields):
+            self.update_derived_fields()
+            kwargs["update_fields"] = set(update_fields) | set(self.DERIVED_FIELDS)
+        super().save(*args, **kwargs)
+
 
 class Poll(models.Model):
     content = models.OneToOneField(
@@ -49,3 +96,94 @@ class PollOption(models.Model):
     def __str__(self):
         return self.option_text
 
+
+
+class ContentDailyStats(models.Model):
+    """
+    Per-content, per-day traffic rollup built by `rollup_analytics`
+    from the append-only event log (see core/analytics.py).
+    """
+    content = models.ForeignKey(
+        Content, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+    shares = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(fields=["content", "day"], name="uniq_content_day_stats"),
+        ]
+        indexes = [
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.content_id} @ {self.day}"
+
+
+class RolledUpSegment(models.Model):
+    """
+    An analytics log segment whose counts are already in ContentDailyStats.
+    Written in the same transaction as the counts, so a segment left on
+    disk by a crashed rollup is deleted instead of being counted twice.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """
+    A unit of background work in the database-backed queue (see
+    core/jobs.py). Enqueued in the same transaction as the change that
+    needs it and run by `manage.py run_worker`.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # At most one *queued* job per key; once it starts, the key is free again
+    # so a later change gets its own run.
+    idempotency_key = models.CharField(max_length=255, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["idempotency_key"],
+                condition=models.Q(status="queued"),
+                name="uniq_queued_job_key",
+            ),
+        ]
+        indexes = [
+            # Claiming: oldest due jobs first
+            models.Index(fields=["status", "run_after"], name="job_due_idx"),
+            # Cleanup and latency metrics
+            models.Index(fields=["status", "finished_at"], name="job_finished_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
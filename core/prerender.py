@@ -0,0 +1,276 @@
+# core/prerender.py
+"""
+Static pre-rendering of the public pages.
+
+Pages are written under PRERENDER_ROOT so a front proxy can serve them
+directly, falling back to Django on a miss:
+
+    /                              -> index.html
+    /content/                      -> content/index.html
+    /content/?page=N               -> content/page/N/index.html
+    /content/?type=T               -> content/type/T/index.html
+    /content/?type=T&page=N        -> content/type/T/page/N/index.html
+    /content/<pk>/                 -> content/<pk>/index.html
+
+Searches (?q=) are never pre-rendered. Pages carry no per-visitor state
+(no CSRF token), and detail views are counted by the page's own beacon
+(core.views.track_event), so serving the static copy loses no analytics.
+"""
+import logging
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import resolve
+
+from . import jobs
+from .models import Content
+
+logger = logging.getLogger(__name__)
+
+LIST_TYPES = [key for key, _ in Content.CONTENT_TYPES]
+
+
+# ---------- Page specs ----------
+# A page is a hashable tuple: ("home",), ("list", ctype, page) or ("detail", pk).
+# ctype is "" for the unfiltered listing.
+
+def page_url(page):
+    kind = page[0]
+    if kind == "home":
+        return "/"
+    if kind == "list":
+        _, ctype, number = page
+        params = []
+        if ctype:
+            params.append(f"type={ctype}")
+        if number > 1:
+            params.append(f"page={number}")
+        return "/content/" + ("?" + "&".join(params) if params else "")
+    return f"/content/{page[1]}/"
+
+
+def page_file(page, root=None):
+    root = Path(root or settings.PRERENDER_ROOT)
+    kind = page[0]
+    if kind == "home":
+        return root / "index.html"
+    if kind == "list":
+        _, ctype, number = page
+        path = root / "content"
+        if ctype:
+            path = path / "type" / ctype
+        if number > 1:
+            path = path / "page" / str(number)
+        return path / "index.html"
+    return root / "content" / str(page[1]) / "index.html"
+
+
+def list_page_count(ctype=""):
+    from .views import CONTENT_LIST_PAGE_SIZE
+
+    qs = Content.objects.all()
+    if ctype:
+        qs = qs.filter(content_type=ctype)
+    return max(1, math.ceil(qs.count() / CONTENT_LIST_PAGE_SIZE))
+
+
+def list_pages(ctype=""):
+    return [("list", ctype, n) for n in range(1, list_page_count(ctype) + 1)]
+
+
+def all_pages():
+    pages = [("home",)]
+    for ctype in [""] + LIST_TYPES:
+        pages.extend(list_pages(ctype))
+    pages.extend(("detail", pk) for pk in Content.objects.values_list("pk", flat=True).iterator())
+    return pages
+
+
+def pages_for_content(pk, content_types, structural=True):
+    """
+    Pages affected by saving/deleting one Content row.
+
+    `content_types` are the row's type before and after the change.
+    A structural change (create, delete, type change) shifts every page of
+    the affected listings; a plain edit only touches the page holding the row.
+    """
+    from .views import CONTENT_LIST_PAGE_SIZE
+
+    pages = {("home",)}
+    listings = {""} | {t for t in content_types if t}
+    if structural:
+        for ctype in listings:
+            pages.update(list_pages(ctype))
+    else:
+        content = Content.objects.filter(pk=pk).values("created_at").first()
+        if content is not None:
+            for ctype in listings:
+                newer = Content.objects.filter(created_at__gt=content["created_at"])
+                if ctype:
+                    newer = newer.filter(content_type=ctype)
+                pages.add(("list", ctype, newer.count() // CONTENT_LIST_PAGE_SIZE + 1))
+    pages.add(("detail", pk))
+    return pages
+
+
+# ---------- Rendering ----------
+
+def build_request(url):
+    request = RequestFactory().get(url, HTTP_HOST=settings.PRERENDER_HOST, secure=settings.PRERENDER_HTTPS)
+    request.user = AnonymousUser()
+    request.resolver_match = resolve(request.path_info)
+    return request
+
+
+def render_page(page):
+    """Render one page to HTML, or None when it no longer exists."""
+    from . import views
+
+    request = build_request(page_url(page))
+    kind = page[0]
+    if kind == "home":
+        return render_to_string("home.html", views.home_context(), request=request)
+    if kind == "list":
+        _, ctype, number = page
+        context = views.content_list_context(ctype, "", number)
+        return render_to_string("content_list.html", context, request=request)
+    content = Content.objects.filter(pk=page[1]).select_related("poll").first()
+    if content is None:
+        return None
+    # Static copies are shared by every visitor: no per-user CSRF token.
+    context = {**views.content_detail_context(content), "prerendered": True}
+    return render_to_string("content_detail.html", context, request=request)
+
+
+def write_atomic(path, text):
+    """Write via a temp file in the same directory + rename, so readers never see a partial page."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".html")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+WRITTEN, REMOVED, FAILED = "written", "removed", "failed"
+
+
+def render_and_write(page, root=None):
+    """
+    Render one page and write it (or remove it if it is gone).
+    Errors are logged and reported as FAILED so one broken page never
+    aborts a whole run; the previous file, if any, is left in place.
+    """
+    path = page_file(page, root)
+    try:
+        html = render_page(page)
+        if html is None:
+            path.unlink(missing_ok=True)
+            return page, REMOVED
+        write_atomic(path, html)
+    except Exception:
+        logger.exception("Could not pre-render %s", page_url(page))
+        return page, FAILED
+    return page, WRITTEN
+
+
+def prune_list_pages(root=None):
+    """Remove listing pages past the current last page (left behind by deletes)."""
+    removed = 0
+    for ctype in [""] + LIST_TYPES:
+        last = list_page_count(ctype)
+        pages_dir = page_file(("list", ctype, 2), root).parent.parent
+        if not pages_dir.is_dir():
+            continue
+        for child in pages_dir.iterdir():
+            if child.name.isdigit() and int(child.name) > last:
+                (child / "index.html").unlink(missing_ok=True)
+                removed += 1
+    return removed
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def render_pages(pages, root=None, workers=None):
+    """
+    Render pages with a process pool (template rendering is CPU-bound).
+    Returns a {WRITTEN/REMOVED/FAILED: count} dict.
+    """
+    pages = sorted(set(pages), key=str)
+    counts = {WRITTEN: 0, REMOVED: 0, FAILED: 0}
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers == 1 or len(pages) <= 1:
+        results = [render_and_write(page, root) for page in pages]
+    else:
+        # Children must open their own DB connections, never share the parent's.
+        connections.close_all()
+        chunksize = max(1, len(pages) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = list(pool.map(render_and_write, pages, [root] * len(pages), chunksize=chunksize))
+    for _, status in results:
+        counts[status] += 1
+    return counts
+
+
+# ---------- Incremental refresh from the blogger views ----------
+
+REFRESH_JOB = "prerender.refresh"
+
+
+def refresh_batch(payloads):
+    """
+    Job handler (see core/tasks.py): re-render the pages affected by
+    several refresh requests, with the shared pages (home, listings)
+    rendered only once.
+    """
+    pages, structural = set(), False
+    for payload in payloads:
+        for pk in payload["pks"]:
+            pages |= pages_for_content(pk, payload["types"], payload["structural"])
+        structural = structural or payload["structural"]
+    counts = render_pages(pages, workers=1)
+    if structural:
+        prune_list_pages()
+    if counts[FAILED]:
+        logger.warning("Incremental pre-render: %d page(s) failed", counts[FAILED])
+    return counts
+
+
+def refresh_contents(pks, content_types, structural=True):
+    """
+    Queue a re-render of the pages affected by saving/deleting the given
+    Content rows; `manage.py run_worker` picks it up once the transaction
+    commits, so the blogger request never waits for rendering. Repeated
+    saves of one item while its job is still queued collapse into one job.
+    """
+    if not settings.PRERENDER_ENABLED:
+        return
+    pks, content_types = sorted(pks), sorted(set(content_types))
+    key = None
+    if len(pks) == 1:
+        key = f"prerender:{pks[0]}:{','.join(content_types)}:{int(structural)}"
+    jobs.enqueue(
+        REFRESH_JOB,
+        {"pks": pks, "types": content_types, "structural": structural},
+        key=key,
+    )
+
+
+def refresh_content(pk, content_types, structural=True):
+    refresh_contents([pk], content_types, structural)
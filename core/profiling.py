@@ -0,0 +1,186 @@
+# core/profiling.py
+"""
+Helpers for the sampling profiler middleware (core.middleware).
+
+Every profiled request gets:
+  * exact DB time/query count from a connection execute_wrapper,
+  * a cheap stack sample every PROFILING_INTERVAL_MS from a shared
+    sampler thread, used to split the rest into template vs view time,
+  * a full cProfile run, but only for the randomly sampled fraction.
+
+Requests that were sampled or ran over PROFILING_SLOW_MS are dumped as
+JSON (+ .prof for cProfile runs) into PROFILING_DIR, keeping only the
+newest PROFILING_MAX_DUMPS. `manage.py profile_report` summarizes them.
+"""
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+MAX_STACK_DEPTH = 64
+MAX_SAMPLES = 5000
+TOP_FUNCTIONS = 15
+
+_DB_MARKER = os.sep + os.path.join("django", "db") + os.sep
+_TEMPLATE_MARKER = os.sep + os.path.join("django", "template") + os.sep
+
+
+class QueryTimer:
+    """execute_wrapper that accumulates time spent in the database."""
+    def __init__(self):
+        self.seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class StackSampler:
+    """
+    One background thread that periodically snapshots the stacks of the
+    request threads currently being watched. Idle when nothing is watched.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def watch(self, ident):
+        samples = []
+        with self._lock:
+            self._watched[ident] = samples
+        self._wake.set()
+        return samples
+
+    def unwatch(self, ident):
+        with self._lock:
+            return self._watched.pop(ident, [])
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._watched:
+                    self._wake.clear()
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._watched.items():
+                    frame = frames.get(ident)
+                    if frame is not None and len(samples) < MAX_SAMPLES:
+                        samples.append(_stack(frame))
+
+
+def _stack(frame):
+    """Innermost-first tuple of (filename, function, lineno)."""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_name, frame.f_lineno))
+        frame = frame.f_back
+    return tuple(stack)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(settings.PROFILING_INTERVAL_MS / 1000)
+    return _sampler
+
+
+def phase_breakdown(elapsed, db_seconds, samples):
+    """
+    Split wall time into db/template/view milliseconds. DB time is exact;
+    template time is the share of (non-DB) samples inside django.template.
+    """
+    template_share = 0.0
+    if samples:
+        in_template = 0
+        for stack in samples:
+            files = [f for f, _, _ in stack]
+            if any(_DB_MARKER in f for f in files):
+                continue
+            if any(_TEMPLATE_MARKER in f for f in files):
+                in_template += 1
+        template_share = in_template / len(samples)
+    db_ms = db_seconds * 1000
+    template_ms = min(elapsed * 1000 * template_share, max(elapsed * 1000 - db_ms, 0))
+    view_ms = max(elapsed * 1000 - db_ms - template_ms, 0)
+    return {"db": round(db_ms, 2), "template": round(template_ms, 2), "view": round(view_ms, 2)}
+
+
+def _func_label(filename, lineno, name):
+    return f"{filename}:{lineno}({name})"
+
+
+def top_from_profile(profiler, limit=TOP_FUNCTIONS):
+    """Top functions by self time from a cProfile run, as [label, ms] pairs."""
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [[_func_label(*func), round(tottime * 1000, 3)] for func, (_, _, tottime, _, _) in rows]
+
+
+def top_from_samples(samples, elapsed, limit=TOP_FUNCTIONS):
+    """Top functions by estimated self time from stack samples, as [label, ms] pairs."""
+    if not samples:
+        return []
+    leaves = Counter(
+        _func_label(filename, lineno, name)
+        for (filename, name, lineno), *_ in filter(None, samples)
+    )
+    per_sample_ms = elapsed * 1000 / len(samples)
+    return [[label, round(n * per_sample_ms, 3)] for label, n in leaves.most_common(limit)]
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def dump(record, profiler=None):
+    """Write one profile record (and .prof if present), then rotate old dumps."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    if profiler is not None:
+        profiler.dump_stats(directory / f"{stem}.prof")
+        record["prof_file"] = f"{stem}.prof"
+    tmp = directory / f".{stem}.json.tmp"
+    tmp.write_text(json.dumps(record), encoding="utf-8")
+    os.replace(tmp, directory / f"{stem}.json")
+    rotate(directory, settings.PROFILING_MAX_DUMPS)
+
+
+def rotate(directory, keep):
+    dumps = sorted(directory.glob("*.json"))
+    for old in dumps[:-keep] if keep else dumps:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def load_dumps(directory=None):
+    for path in sorted(Path(directory or profile_dir()).glob("*.json")):
+        try:
+            yield json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
@@ -0,0 +1,23 @@
+# core/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_content_generation
+from .models import Content, Poll, PollOption
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_save, sender=Poll)
+@receiver(post_save, sender=PollOption)
+def content_saved(sender, update_fields=None, **kwargs):
+    # View counting saves only view_count; that must not flush every cache.
+    if update_fields is not None and set(update_fields) <= {"view_count"}:
+        return
+    bump_content_generation()
+
+
+@receiver(post_delete, sender=Content)
+@receiver(post_delete, sender=Poll)
+@receiver(post_delete, sender=PollOption)
+def content_deleted(sender, **kwargs):
+    bump_content_generation()
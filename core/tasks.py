@@ -0,0 +1,8 @@
+# core/tasks.py
+"""Background job handlers for core; loaded by `manage.py run_worker`."""
+from . import jobs, prerender
+
+
+@jobs.register(prerender.REFRESH_JOB, batch_size=50)
+def prerender_refresh(payloads):
+    prerender.refresh_batch(payloads)
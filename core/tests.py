@@ -1,3 +1,826 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+from xml.dom import minidom
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheKeyWarning, cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, api, jobs, prerender, profiling
+from .admin import EstimatedCountPaginator
+from .middleware import SamplingProfilerMiddleware
+from .metrics import FakeSubscriberSource, StaleWhileRevalidate
+from .views import WARMUP_ENVIRON_KEY, content_list_context
+from .models import Content, ContentDailyStats, Job, Poll, PollOption, RolledUpSegment
+
+
+# The site cache is file-based and shared with the dev server; TestCase never
+# commits, so on_commit generation bumps never fire. Give cache-reading
+# tests a private, empty cache instead. Analytics is off for the same reason:
+# its writer appends to the real ANALYTICS_LOG_DIR.
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# The manifest storage needs collectstatic; use plain URLs in tests that render {% static %}.
+PLAIN_STATIC_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ANALYTICS_ENABLED=False)
+class CachedViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def epoch(year, month, day, hour=12):
+    return int(datetime(year, month, day, hour, tzinfo=dt_timezone.utc).timestamp())
+
+
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.a = Content.objects.create(title="A", content_type="text")
+        self.b = Content.objects.create(title="B", content_type="text")
+        self.now = epoch(2026, 10, 19, 15)
+
+    def write_segment(self, hour, lines, pid=1, suffix=analytics.SEGMENT_SUFFIX):
+        path = self.dir / f"{analytics.SEGMENT_PREFIX}{hour}-{pid}{suffix}"
+        path.write_text("".join(f"{ts} {cid} {code}\n" for ts, cid, code in lines))
+        return path
+
+    def stats(self):
+        return {
+            (row.content_id, row.day): (row.views, row.votes, row.shares)
+            for row in ContentDailyStats.objects.all()
+        }
+
+    def test_read_segment_aggregates_per_content_and_day(self):
+        ts = epoch(2026, 10, 18)
+        path = self.write_segment("2026101812", [
+            (ts, self.a.pk, "v"), (ts, self.a.pk, "v"), (ts, self.a.pk, "s"),
+            (ts, self.b.pk, "p"), (epoch(2026, 10, 17), self.b.pk, "v"),
+        ])
+        with open(path, "a") as fh:
+            fh.write("garbled line\n12 34\n")
+        totals = analytics.read_segment(path)
+        self.assertEqual(dict(totals[(self.a.pk, date(2026, 10, 18))]), {"views": 2, "shares": 1})
+        self.assertEqual(dict(totals[(self.b.pk, date(2026, 10, 18))]), {"votes": 1})
+        self.assertEqual(dict(totals[(self.b.pk, date(2026, 10, 17))]), {"views": 1})
+        self.assertEqual(len(totals), 3)
+
+    def test_apply_totals_merges_and_drops_deleted_content(self):
+        day = date(2026, 10, 18)
+        ContentDailyStats.objects.create(content=self.a, day=day, views=10, shares=1)
+        gone = Content.objects.create(title="Gone", content_type="text")
+        gone_pk = gone.pk
+        gone.delete()
+        written = analytics.apply_totals({
+            (self.a.pk, day): {"views": 3, "shares": 2},
+            (self.b.pk, day): {"votes": 4},
+            (gone_pk, day): {"views": 99},
+        })
+        self.assertEqual(written, 2)
+        self.assertEqual(self.stats(), {
+            (self.a.pk, day): (13, 0, 3),
+            (self.b.pk, day): (0, 4, 0),
+        })
+
+    def test_rollup_skips_the_current_hour(self):
+        self.write_segment("2026101814", [(epoch(2026, 10, 18, 14), self.a.pk, "v")])
+        current = self.write_segment("2026101915", [(self.now, self.a.pk, "v")])
+        self.write_segment("2026101914", [(epoch(2026, 10, 19, 14), self.a.pk, "v")])
+        segments, _ = analytics.rollup(self.dir, now=self.now)
+        self.assertEqual(segments, 2)
+        self.assertTrue(current.exists())
+        self.assertEqual(self.stats(), {
+            (self.a.pk, date(2026, 10, 18)): (1, 0, 0),
+            (self.a.pk, date(2026, 10, 19)): (1, 0, 0),
+        })
+        self.assertEqual(analytics.rollup(self.dir, now=self.now), (0, 0))
+        self.assertEqual(analytics.rollup(self.dir, now=self.now, include_current=True)[0], 1)
+        self.assertEqual(self.stats()[(self.a.pk, date(2026, 10, 19))], (2, 0, 0))
+
+    def test_crashed_claim_is_applied_once(self):
+        # A run claimed this segment and died before committing.
+        self.write_segment("2026101812", [(epoch(2026, 10, 18), self.a.pk, "v")],
+                           suffix=".log.abc" + analytics.CLAIMED_SUFFIX)
+        self.assertEqual(analytics.rollup(self.dir, now=self.now)[0], 1)
+        self.assertEqual(self.stats(), {(self.a.pk, date(2026, 10, 18)): (1, 0, 0)})
+        self.assertEqual(list(self.dir.glob("events-*")), [])
+
+    def test_segment_committed_before_crash_is_not_replayed(self):
+        claimed = self.write_segment("2026101812", [(epoch(2026, 10, 18), self.a.pk, "v")],
+                                     suffix=".log.abc" + analytics.CLAIMED_SUFFIX)
+        # Counts and marker were committed, then the run died before unlink().
+        analytics.apply_totals(analytics.read_segment(claimed))
+        RolledUpSegment.objects.create(name=claimed.name)
+        self.assertEqual(analytics.rollup(self.dir, now=self.now), (1, 0))
+        self.assertEqual(self.stats(), {(self.a.pk, date(2026, 10, 18)): (1, 0, 0)})
+        self.assertFalse(claimed.exists())
+        self.assertFalse(RolledUpSegment.objects.exists())
+
+    def test_claims_get_unique_names(self):
+        path = self.write_segment("2026101812", [])
+        claimed = analytics.claim_segment(path)
+        self.assertNotEqual(claimed.name, path.name + analytics.CLAIMED_SUFFIX)
+        self.assertTrue(claimed.name.endswith(analytics.CLAIMED_SUFFIX))
+        # A second claimer racing on the original name finds nothing to take.
+        self.assertIsNone(analytics.claim_segment(path))
+
+    def test_concurrent_rollup_is_refused(self):
+        self.write_segment("2026101812", [(epoch(2026, 10, 18), self.a.pk, "v")])
+        with analytics.rollup_lock(self.dir):
+            with self.assertRaises(analytics.RollupInProgress):
+                analytics.rollup(self.dir, now=self.now)
+        self.assertEqual(self.stats(), {})
+        self.assertEqual(analytics.rollup(self.dir, now=self.now)[0], 1)
+        self.assertEqual(self.stats(), {(self.a.pk, date(2026, 10, 18)): (1, 0, 0)})
+
+
+class ViewBeaconTests(CachedViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = Content.objects.create(title="Sleep", content_type="text", body="Rest well.")
+        self.url = reverse("content_event", args=[self.content.pk])
+        patcher = mock.patch("core.views.record_event")
+        self.record_event = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def view_count(self):
+        self.content.refresh_from_db()
+        return self.content.view_count
+
+    def test_detail_page_does_not_count_the_view_itself(self):
+        response = self.client.get(self.content.get_absolute_url())
+        self.assertContains(response, "trackEvent('view')")
+        self.assertEqual(self.view_count(), 0)
+
+    def test_view_beacon_counts(self):
+        self.assertEqual(self.client.post(self.url, {"kind": "view"}).status_code, 204)
+        self.assertEqual(self.client.post(self.url, {"kind": "view"}).status_code, 204)
+        self.assertEqual(self.view_count(), 2)
+        self.record_event.assert_has_calls([mock.call(self.content.pk, "view")] * 2)
+
+    def test_share_beacon_does_not_count_a_view(self):
+        self.assertEqual(self.client.post(self.url, {"kind": "share"}).status_code, 204)
+        self.assertEqual(self.view_count(), 0)
+        self.record_event.assert_called_once_with(self.content.pk, "share")
+
+    def test_unknown_kind_and_warmup_requests(self):
+        self.assertEqual(self.client.post(self.url, {"kind": "like"}).status_code, 400)
+        self.client.post(self.url, {"kind": "view"}, **{WARMUP_ENVIRON_KEY: True})
+        self.assertEqual(self.view_count(), 0)
+        self.record_event.assert_not_called()
+
+    def test_prerendered_detail_has_no_csrf_token(self):
+        poll_content = Content.objects.create(title="Poll", content_type="poll")
+        poll = Poll.objects.create(content=poll_content, question="Sleep enough?")
+        PollOption.objects.create(poll=poll, option_text="Yes")
+        html = prerender.render_page(("detail", poll_content.pk))
+        self.assertIn('id="poll-form"', html)
+        self.assertNotIn("csrfmiddlewaretoken", html)
+        live = self.client.get(poll_content.get_absolute_url())
+        self.assertContains(live, "csrfmiddlewaretoken")
+
+
+class DerivedFieldsTests(TestCase):
+    OLD_TEMPLATE = Template(
+        "{% autoescape off %}{% with words=body|default_if_none:''|wordcount %}{{ words }}|"
+        "{% widthratio words 200 1 %}{% endwith %}|"
+        "{{ excerpt|default:body|truncatewords:30 }}{% endautoescape %}"
+    )
+
+    def assert_matches_old_template(self, content):
+        old = self.OLD_TEMPLATE.render(Context({"body": content.body, "excerpt": content.excerpt}))
+        words, minutes, meta = old.split("|", 2)
+        self.assertEqual(content.word_count, int(words))
+        # The template's `mins|default:1` never applied ("0" is a truthy
+        # string) and showed "0 min read"; the stored value has the intended floor.
+        self.assertEqual(content.reading_minutes, max(1, int(minutes)))
+        self.assertEqual(content.meta_description, meta)
+        if content.body:
+            self.assertEqual(content.body_html, Template("{{ body|linebreaks }}").render(
+                Context({"body": content.body})
+            ))
+
+    def test_parity_with_the_old_template_filters(self):
+        cases = [
+            ("", "Short tip."),
+            ("Card preview.", " ".join(["word"] * 100)),
+            ("", " ".join(["word"] * 300)),  # 1.5 minutes
+            ("", " ".join(["word"] * 500)),  # 2.5 minutes
+            (None, "First paragraph.\n\nSecond & <b>bold</b> line\nand more."),
+            ("Only an excerpt.", None),
+        ]
+        for excerpt, body in cases:
+            with self.subTest(excerpt=excerpt, body=body and body[:20]):
+                content = Content(title="T", content_type="article", excerpt=excerpt, body=body)
+                content.update_derived_fields()
+                self.assert_matches_old_template(content)
+
+    def test_body_html_is_escaped(self):
+        content = Content.objects.create(title="T", content_type="text", body="<script>x</script>\nok")
+        self.assertEqual(content.body_html, "<p>&lt;script&gt;x&lt;/script&gt;<br>ok</p>")
+
+    def test_update_fields_is_widened_for_source_fields(self):
+        content = Content.objects.create(title="T", content_type="text", body="one two")
+        content.body = "one two three"
+        content.save(update_fields=["body"])
+        content.refresh_from_db()
+        self.assertEqual((content.word_count, content.meta_description), (3, "one two three"))
+
+        content.body = "not saved"
+        content.view_count = 5
+        content.save(update_fields=["view_count"])
+        content.refresh_from_db()
+        self.assertEqual((content.body, content.word_count, content.view_count), ("one two three", 3, 5))
+
+    def test_backfill_missing_only(self):
+        body_only = Content.objects.create(title="A", content_type="article", body="Long read here.")
+        excerpt_only = Content.objects.create(title="B", content_type="image", excerpt="A photo.")
+        Content.objects.create(title="C", content_type="text", body="Already done.")
+        Content.objects.create(title="D", content_type="video")
+        Content.objects.filter(pk__in=[body_only.pk, excerpt_only.pk]).update(
+            word_count=0, meta_description="", body_html="",
+        )
+        out = StringIO()
+        call_command("backfill_derived_fields", missing_only=True, batch_size=1, stdout=out)
+        self.assertIn("Backfilled 2 row(s).", out.getvalue())
+        body_only.refresh_from_db()
+        excerpt_only.refresh_from_db()
+        self.assertEqual((body_only.word_count, body_only.body_html), (3, "<p>Long read here.</p>"))
+        self.assertEqual(excerpt_only.meta_description, "A photo.")
+
+
+class PrerenderSiteTests(TestCase):
+    @override_settings(DEBUG=False, PRERENDER_HOST="localhost")
+    def test_refuses_localhost_in_production(self):
+        with self.assertRaisesMessage(CommandError, "PRERENDER_HOST"):
+            call_command("prerender_site")
+
+    @override_settings(DEBUG=False, PRERENDER_HOST="")
+    def test_refuses_unset_host(self):
+        with self.assertRaisesMessage(CommandError, "PRERENDER_HOST"):
+            call_command("prerender_site")
+
+
+class ContentListContextTests(CachedViewTestCase):
+    def setUp(self):
+        super().setUp()
+        Content.objects.create(title="Tip", content_type="text")
+        Content.objects.create(title="Read", content_type="article")
+
+    def test_unknown_type_is_normalized(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            context = content_list_context("foo bar\n", "", 1)
+        self.assertIsNone(context["ctype"])
+        self.assertEqual(len(context["post_list"]), 2)
+
+    def test_known_type_filters(self):
+        context = content_list_context("article", "", 1)
+        self.assertEqual(context["ctype"], "article")
+        self.assertEqual([c.title for c in context["post_list"]], ["Read"])
+
+
+class EstimatedCountPaginatorTests(CachedViewTestCase):
+    def test_counts_exactly_past_the_cutoff_without_an_estimate(self):
+        Content.objects.bulk_create(
+            [Content(title=f"Tip {i}", content_type="text") for i in range(7)]
+        )
+
+        class SmallCutoff(EstimatedCountPaginator):
+            cutoff = 3
+
+        paginator = SmallCutoff(Content.objects.order_by("-created_at", "-id"), 2)
+        self.assertEqual(paginator.count, 7)
+        self.assertEqual(paginator.num_pages, 4)
+        self.assertEqual(len(paginator.page(4).object_list), 1)
+
+
+class StaleWhileRevalidateTests(CachedViewTestCase):
+    key = "test:subscribers"
+
+    def metric(self, source, fresh_for=60, max_stale=3600):
+        return StaleWhileRevalidate(
+            self.key, source.fetch, fresh_for=fresh_for, max_stale=max_stale, default=-1,
+        )
+
+    def wait_idle(self, metric, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while metric._inflight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(metric._inflight, "background refresh did not finish")
+
+    def test_cold_cache_serves_default_and_refreshes(self):
+        source = FakeSubscriberSource(count=1500)
+        metric = self.metric(source)
+        self.assertEqual(metric.get(), -1)
+        self.wait_idle(metric)
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(metric.get(), 1500)
+        self.assertIsNone(cache.get(metric.lock_key))
+        self.assertEqual(source.calls, 1)  # fresh: no new fetch
+
+    def test_stale_value_is_served_while_one_refresh_runs(self):
+        source = FakeSubscriberSource(count=2000, delay=0.2)
+        metric = self.metric(source, fresh_for=10)
+        cache.set(self.key, (1000, time.time() - 60), 3600)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(metric.get())) for _ in range(10)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.monotonic() - started, 0.2)  # nobody waited on the fetch
+        self.assertEqual(results, [1000] * 10)
+
+        self.wait_idle(metric)
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(metric.get(), 2000)
+
+    def test_refresh_is_skipped_while_another_process_holds_the_lock(self):
+        source = FakeSubscriberSource()
+        metric = self.metric(source)
+        cache.add(metric.lock_key, True, 60)
+        self.assertEqual(metric.get(), -1)
+        self.wait_idle(metric)
+        self.assertEqual(source.calls, 0)
+
+    def test_failure_keeps_stale_value_and_lock(self):
+        source = FakeSubscriberSource(fail=True)
+        metric = self.metric(source, fresh_for=10)
+        cache.set(self.key, (1000, time.time() - 60), 3600)
+        with self.assertLogs("core.metrics", level="ERROR"):
+            self.assertEqual(metric.get(), 1000)
+            self.wait_idle(metric)
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(cache.get(self.key)[0], 1000)
+        # The lock stays until it expires, so the failing upstream is not hammered.
+        self.assertTrue(cache.get(metric.lock_key))
+        self.assertEqual(metric.get(), 1000)
+        self.wait_idle(metric)
+        self.assertEqual(source.calls, 1)
+
+    def test_value_is_dropped_after_max_stale(self):
+        source = FakeSubscriberSource(count=1500, fail=True)
+        metric = self.metric(source, fresh_for=0, max_stale=1)
+        StaleWhileRevalidate(self.key, FakeSubscriberSource(count=900).fetch, 0, 1).refresh()
+        with self.assertLogs("core.metrics", level="ERROR"):
+            self.assertEqual(metric.get(), 900)
+            self.wait_idle(metric)
+        time.sleep(1.1)
+        cache.delete(metric.lock_key)
+        with self.assertLogs("core.metrics", level="ERROR"):
+            self.assertEqual(metric.get(), -1)
+            self.wait_idle(metric)
+
+
+class CssBundleSwitchTests(CachedViewTestCase):
+    def test_cdn_assets_by_default(self):
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "https://cdn.tailwindcss.com")
+        self.assertNotContains(response, "build/site.css")
+
+    @override_settings(
+        CSS_BUNDLE=True, STORAGES=PLAIN_STATIC_STORAGES,
+    )
+    def test_bundle_when_enabled(self):
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "/static/build/site.css")
+        self.assertContains(response, "/static/build/icons.css")
+        self.assertNotContains(response, "cdn.tailwindcss.com")
+
+
+class FeedTests(CachedViewTestCase):
+    def setUp(self):
+        super().setUp()
+        spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool, ignore_errors=True)
+        patcher = override_settings(FEEDS_CACHE_DIR=spool)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.article = Content.objects.create(
+            title="Sleep & you", content_type="article", excerpt="Rest.", image="images/sleep.jpg",
+        )
+
+    def fetch(self, url, **headers):
+        response = self.client.get(url, **headers)
+        body = b"".join(response.streaming_content) if response.status_code == 200 else b""
+        return response, body
+
+    def test_content_list_links_feeds_only_for_known_types(self):
+        response = self.client.get(reverse("content_list"), {"type": "foo bar"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'rel="alternate"')
+        response = self.client.get(reverse("content_list"), {"type": "foo"})
+        self.assertNotContains(response, 'rel="alternate"')
+        response = self.client.get(reverse("content_list"), {"type": "article"})
+        self.assertContains(response, reverse("content_feed", args=["article", "rss"]))
+
+    def test_sitemap_index_and_shard(self):
+        response, body = self.fetch(reverse("sitemap_index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"sitemap-content-1.xml", minidom.parseString(body).toxml().encode())
+        response, body = self.fetch(reverse("sitemap_content", args=[1]))
+        self.assertIn(self.article.get_absolute_url().encode(), body)
+        minidom.parseString(body)
+        self.assertEqual(self.client.get(reverse("sitemap_content", args=[2])).status_code, 404)
+
+    def test_feeds(self):
+        for fmt in ("rss", "atom"):
+            response, body = self.fetch(reverse("content_feed", args=["article", fmt]))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("Sleep &amp; you", body.decode())
+            minidom.parseString(body)
+        self.assertEqual(self.client.get(reverse("content_feed", args=["foo", "rss"])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("content_feed", args=["article", "json"])).status_code, 404)
+
+    def test_second_request_is_served_from_the_spool_and_conditional_requests_304(self):
+        url = reverse("content_feed", args=["article", "rss"])
+        response, first = self.fetch(url)
+        with self.assertNumQueries(0):
+            _, second = self.fetch(url)
+        self.assertEqual(first, second)
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+
+class ContentApiTests(CachedViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = [
+            Content.objects.create(title=f"Tip {n}", content_type="text" if n % 2 else "article")
+            for n in range(5)
+        ]
+        self.list_url = reverse("api_content_list")
+
+    def get_json(self, url, status=200, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status)
+        return json.loads(response.content)
+
+    def test_cursor_pagination_has_no_overlap(self):
+        seen, url = [], f"{self.list_url}?limit=2&fields=id"
+        while url:
+            page = self.get_json(url)
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [c.pk for c in reversed(self.items)])
+
+    def test_next_link_keeps_the_parsed_parameters_only(self):
+        page = self.get_json(f"{self.list_url}?type=text&limit=1&fields=title,id&utm=x")
+        self.assertEqual(page["results"], [{"id": self.items[3].pk, "title": "Tip 3"}])
+        self.assertNotIn("utm", page["next"])
+        page = self.get_json(page["next"])
+        self.assertEqual(page["results"], [{"id": self.items[1].pk, "title": "Tip 1"}])
+        self.assertIsNone(page["next"])
+
+    def test_field_selection(self):
+        page = self.get_json(f"{self.list_url}?fields=title,id,title")
+        self.assertEqual(set(page["results"][0]), {"id", "title"})
+        self.assertEqual(set(self.get_json(self.list_url)["results"][0]), set(api.LIST_FIELDS))
+        error = self.get_json(f"{self.list_url}?fields=id,password", status=400)
+        self.assertEqual(error, {"error": "Unknown field(s): password"})
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get_json(f"{self.list_url}?cursor=nope", status=400), {"error": "Invalid cursor"})
+        self.assertEqual(
+            self.get_json(f"{self.list_url}?limit=ten", status=400), {"error": "limit must be an integer"},
+        )
+        self.get_json(f"{self.list_url}?type=rumour", status=400)
+
+    def test_detail(self):
+        item = self.items[0]
+        url = reverse("api_content_detail", args=[item.pk])
+        self.assertEqual(self.get_json(f"{url}?fields=id,title"), {"id": item.pk, "title": "Tip 0"})
+        missing = reverse("api_content_detail", args=[item.pk + 100])
+        self.assertEqual(self.get_json(missing, status=404), {"error": "Not found"})
+
+    def test_etag_not_modified(self):
+        response = self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            again = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_gzip_encoding(self):
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))["results"]), 5)
+        small = self.client.get(f"{self.list_url}?fields=id&limit=1", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", small["Vary"])
+
+    def test_list_is_one_values_query_then_cached(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"{self.list_url}?type=text")
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"core_content"."content_type" = ', queries[0]["sql"])
+        self.assertNotIn('"core_content"."body"', queries[0]["sql"])
+        with self.assertNumQueries(0):
+            self.client.get(f"{self.list_url}?type=text")
+
+    def test_unknown_parameters_share_the_cache_entry(self):
+        self.client.get(f"{self.list_url}?fields=title,id")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            with self.assertNumQueries(0):
+                self.client.get(f"{self.list_url}?fields=id,title&junk={'x' * 300}")
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        patcher = override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=self.dir, PROFILING_SAMPLE_RATE=1.0,
+            PROFILING_SLOW_MS=1000, PROFILING_MAX_DUMPS=500,
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def records(self):
+        return list(profiling.load_dumps(self.dir))
+
+    def test_disabled_middleware_is_not_used(self):
+        with override_settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                SamplingProfilerMiddleware(lambda request: HttpResponse())
+
+    def test_sampled_request_writes_json_and_cprofile_dump(self):
+        def view(request):
+            Content.objects.count()
+            return HttpResponse("ok")
+        response = SamplingProfilerMiddleware(view)(RequestFactory().get("/content/?page=2"))
+        self.assertEqual(response.content, b"ok")
+        [record] = self.records()
+        self.assertEqual(record["reason"], "sampled")
+        self.assertEqual(record["path"], "/content/?page=2")
+        self.assertEqual(record["queries"], 1)
+        self.assertTrue((self.dir / record["prof_file"]).exists())
+        self.assertTrue(record["top_functions"])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0, PROFILING_SLOW_MS=20)
+    def test_slow_request_writes_stack_sampled_dump(self):
+        def slow_view(request):
+            time.sleep(0.1)
+            return HttpResponse()
+        SamplingProfilerMiddleware(slow_view)(RequestFactory().get("/slow/"))
+        [record] = self.records()
+        self.assertEqual(record["reason"], "slow")
+        self.assertNotIn("prof_file", record)
+        self.assertEqual(list(self.dir.glob("*.prof")), [])
+        self.assertGreater(record["samples"], 0)
+        self.assertIn("(slow_view)", record["top_functions"][0][0])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_fast_unsampled_request_is_not_dumped(self):
+        SamplingProfilerMiddleware(lambda request: HttpResponse())(RequestFactory().get("/"))
+        self.assertEqual(self.records(), [])
+
+    def test_phase_breakdown(self):
+        db = (("/venv/django/db/backends/utils.py", "execute", 1), ("/app/core/views.py", "home", 1))
+        template = (("/venv/django/template/base.py", "render", 1), ("/app/core/views.py", "home", 1))
+        view = (("/app/core/views.py", "home", 1),)
+        # 100ms total, 30ms exact DB time; 2 of the 5 samples are in templates.
+        phases = profiling.phase_breakdown(0.1, 0.03, [db, template, template, view, view])
+        self.assertEqual(phases, {"db": 30.0, "template": 40.0, "view": 30.0})
+        self.assertEqual(profiling.phase_breakdown(0.1, 0.03, []), {"db": 30.0, "template": 0.0, "view": 70.0})
+
+    def test_rotate_keeps_newest_dumps(self):
+        for n in range(5):
+            (self.dir / f"2026101{n}.json").write_text("{}")
+            (self.dir / f"2026101{n}.prof").write_text("")
+        profiling.rotate(self.dir, 2)
+        self.assertEqual(
+            sorted(p.name for p in self.dir.iterdir()),
+            ["20261013.json", "20261013.prof", "20261014.json", "20261014.prof"],
+        )
+
+    def test_profile_report(self):
+        for elapsed in (10.0, 30.0):
+            profiling.dump({
+                "view": "content_list", "elapsed_ms": elapsed, "queries": 2,
+                "phases": {"db": 4.0, "template": 2.0, "view": elapsed - 6},
+                "top_functions": [["core/views.py:10(content_list)", elapsed / 2]],
+            })
+        (self.dir / "broken.json").write_text("{not json")
+        out = StringIO()
+        call_command("profile_report", stdout=out)
+        report = out.getvalue()
+        self.assertIn("content_list", report)
+        self.assertIn("profiles=2  p50=30.0ms  p95=30.0ms  max=30.0ms  queries/req=2.0", report)
+        self.assertIn("avg db=4.0ms  template=2.0ms  view=14.0ms", report)
+        self.assertIn("10.00ms/req  core/views.py:10(content_list)", report)
+
+        out = StringIO()
+        call_command("profile_report", view="home", stdout=out)
+        self.assertIn("No profiles in", out.getvalue())
+
+
+class JobHandlersMixin:
+    """Registers throwaway handlers for the test and removes them afterwards."""
+    def register(self, kind, func, batch_size=1):
+        jobs.register(kind, batch_size=batch_size)(func)
+        self.addCleanup(jobs.registry.pop, kind, None)
+
+
+class JobQueueTests(JobHandlersMixin, TestCase):
+    def setUp(self):
+        self.calls = []
+        self.register("test.batch", self.calls.append, batch_size=3)
+        self.register("test.single", self.calls.append)
+        self.register("test.broken", self.fail_job)
+
+    def fail_job(self, payload):
+        raise RuntimeError("upstream down")
+
+    def claim_one(self, kind):
+        claimed = jobs.claim("w1", [kind])
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def test_enqueue_with_key_is_idempotent_while_queued(self):
+        first = jobs.enqueue("test.single", {"n": 1}, key="k")
+        again = jobs.enqueue("test.single", {"n": 2}, key="k")
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(Job.objects.count(), 1)
+        # Once the job has started, the key is free for the next change.
+        self.claim_one("test.single")
+        later = jobs.enqueue("test.single", {"n": 3}, key="k")
+        self.assertNotEqual(later.pk, first.pk)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+        # Jobs without a key never collapse.
+        jobs.enqueue("test.single")
+        jobs.enqueue("test.single")
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 3)
+
+    def test_claim_batches_same_kind_oldest_first(self):
+        for n in range(5):
+            jobs.enqueue("test.batch", {"n": n})
+        jobs.enqueue("test.single", {"n": 99})
+        jobs.enqueue("test.batch", {"n": 100}, delay=3600)  # not due yet
+
+        claimed = jobs.claim("w1", ["test.batch", "test.single"])
+        self.assertEqual([job.payload["n"] for job in claimed], [0, 1, 2])
+        self.assertTrue(all(job.status == Job.RUNNING and job.attempts == 1 for job in claimed))
+        self.assertEqual(len({job.locked_by for job in claimed}), 1)
+        self.assertEqual([job.payload["n"] for job in jobs.claim("w2", ["test.batch"])], [3, 4])
+        self.assertEqual(jobs.claim("w3", ["test.batch"]), [])
+        self.assertEqual([job.payload["n"] for job in jobs.claim("w3", ["test.single"])], [99])
+
+    def test_racing_claimers_never_share_a_job(self):
+        for n in range(3):
+            jobs.enqueue("test.batch", {"n": n})
+        original_update = QuerySet.update
+        rival = None
+
+        def update_after_rival(queryset, **kwargs):
+            # The rival claims between our SELECT of due ids and our UPDATE.
+            nonlocal rival
+            if kwargs.get("status") == Job.RUNNING and rival is None:
+                rival = []
+                rival = jobs.claim("rival", ["test.batch"])
+            return original_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_after_rival):
+            mine = jobs.claim("me", ["test.batch"])
+        self.assertEqual(mine, [])
+        self.assertEqual(len(rival), 3)
+        self.assertEqual(Job.objects.filter(locked_by__startswith="rival:").count(), 3)
+
+    def test_failure_backs_off_then_fails_at_max_attempts(self):
+        jobs.enqueue("test.broken", max_attempts=2)
+        with self.assertLogs("core.jobs", level="ERROR"):
+            jobs.run_jobs([self.claim_one("test.broken")])
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.QUEUED, 1, ""))
+        delay = (job.run_after - timezone.now()).total_seconds()
+        self.assertTrue(jobs.BACKOFF_BASE * 0.5 - 1 < delay <= jobs.BACKOFF_BASE * 1.5, delay)
+        self.assertIn("upstream down", job.last_error)
+        self.assertEqual(jobs.claim("w1", ["test.broken"]), [])  # not due yet
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs("core.jobs", level="ERROR"):
+            jobs.run_jobs([self.claim_one("test.broken")])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_backoff_doubles_and_is_capped(self):
+        with mock.patch("core.jobs.random.uniform", return_value=1.0):
+            self.assertEqual([jobs.backoff(n) for n in (1, 2, 3)], [10, 20, 40])
+            self.assertEqual(jobs.backoff(30), jobs.BACKOFF_MAX)
+
+    def test_failed_job_is_superseded_by_a_newer_queued_one(self):
+        jobs.enqueue("test.broken", key="k")
+        running = self.claim_one("test.broken")
+        newer = jobs.enqueue("test.broken", key="k")
+        with self.assertLogs("core.jobs", level="ERROR"):
+            jobs.run_jobs([running])
+        running.refresh_from_db()
+        self.assertEqual(running.status, Job.DONE)
+        self.assertTrue(running.last_error.startswith("Superseded"))
+        newer.refresh_from_db()
+        self.assertEqual(newer.status, Job.QUEUED)
+
+    def test_success_marks_the_batch_done(self):
+        for n in range(2):
+            jobs.enqueue("test.batch", {"n": n})
+        jobs.run_jobs(jobs.claim("w1", ["test.batch"]))
+        self.assertEqual(self.calls, [[{"n": 0}, {"n": 1}]])
+        self.assertEqual(set(Job.objects.values_list("status", flat=True)), {Job.DONE})
+
+    def test_requeue_stale(self):
+        jobs.enqueue("test.single", {"n": 1})
+        jobs.enqueue("test.single", {"n": 2}, max_attempts=1)
+        jobs.enqueue("test.single", {"n": 3})
+        Job.objects.update(
+            status=Job.RUNNING, attempts=1, locked_by="dead:1",
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        Job.objects.filter(payload__n=3).update(started_at=timezone.now())
+        self.assertEqual(jobs.requeue_stale(600), 2)
+        statuses = dict(Job.objects.values_list("payload__n", "status"))
+        self.assertEqual(statuses, {1: Job.QUEUED, 2: Job.FAILED, 3: Job.RUNNING})
+
+    def test_purge_keeps_recent_and_failed_jobs(self):
+        old = timezone.now() - timedelta(days=10)
+        for n, status, finished in [(1, Job.DONE, old), (2, Job.DONE, timezone.now()), (3, Job.FAILED, old)]:
+            job = jobs.enqueue("test.single", {"n": n})
+            Job.objects.filter(pk=job.pk).update(status=status, finished_at=finished)
+        self.assertEqual(jobs.purge(7), 1)
+        self.assertEqual(sorted(Job.objects.values_list("payload__n", flat=True)), [2, 3])
+
+    def test_queue_stats(self):
+        now = timezone.now()
+        jobs.enqueue("test.single")
+        Job.objects.filter(pk=jobs.enqueue("test.single").pk).update(created_at=now - timedelta(seconds=30))
+        for status, age in [(Job.DONE, 4), (Job.DONE, 2), (Job.FAILED, 1)]:
+            job = jobs.enqueue("test.batch")
+            Job.objects.filter(pk=job.pk).update(
+                status=status, created_at=now - timedelta(seconds=age),
+                started_at=now - timedelta(seconds=1), finished_at=now,
+            )
+        stats = jobs.queue_stats()
+        self.assertEqual(stats["test.single"]["queued"], 2)
+        self.assertGreaterEqual(stats["test.single"]["oldest_queued_s"], 30)
+        batch = stats["test.batch"]
+        self.assertEqual((batch["queued"], batch["done"], batch["failed"]), (0, 2, 1))
+        self.assertAlmostEqual(batch["latency_avg_s"], 7 / 3, places=1)
+        self.assertAlmostEqual(batch["latency_max_s"], 4, places=1)
+        self.assertAlmostEqual(batch["run_avg_s"], 1, places=1)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class JobAdminTests(CachedViewTestCase):
+    def test_changelist_count_follows_new_jobs(self):
+        user = get_user_model().objects.create_superuser("admin", password="pw")
+        self.client.force_login(user)
+        url = reverse("admin:core_job_changelist")
+        self.assertContains(self.client.get(url), "0 jobs")
+        jobs.enqueue("test.echo", {"n": 1})
+        self.assertContains(self.client.get(url), "1 job")
+
+
+class WorkerTests(JobHandlersMixin, TransactionTestCase):
+    # The worker runs jobs on pool threads, which need committed rows.
+    def test_run_once_drains_due_jobs(self):
+        batches, singles = [], []
+        self.register("test.batch", batches.append, batch_size=3)
+        self.register("test.single", singles.append)
+        for n in range(5):
+            jobs.enqueue("test.batch", {"n": n})
+        jobs.enqueue("test.single", {"n": 9})
+        jobs.enqueue("test.single", {"n": 10}, delay=3600)
+
+        worker = jobs.Worker(concurrency=2, poll_interval=0.01)
+        self.assertEqual(worker.run(once=True), 6)
+        self.assertEqual(sorted(len(batch) for batch in batches), [2, 3])
+        self.assertEqual(singles, [{"n": 9}])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 6)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
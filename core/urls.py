@@ -1,8 +1,15 @@
 from django.urls import path
-from . import views
+from . import api, feeds, views
 
 urlpatterns = [
     path("", views.home, name="home"),
     path("content/", views.content_list, name="content_list"),
     path("content/<int:pk>/", views.content_detail, name="content_detail"),
+    path("content/<int:pk>/event/", views.track_event, name="content_event"),
+    path("api/content/", api.content_list, name="api_content_list"),
+    path("api/content/<int:pk>/", api.content_detail, name="api_content_detail"),
+    path("sitemap.xml", feeds.sitemap_index, name="sitemap_index"),
+    path("sitemap-pages.xml", feeds.sitemap_pages, name="sitemap_pages"),
+    path("sitemap-content-<int:shard>.xml", feeds.sitemap_content, name="sitemap_content"),
+    path("feeds/<slug:ctype>.<slug:fmt>", feeds.content_feed, name="content_feed"),
 ]
@@ -1,45 +1,61 @@
-from django.shortcuts import render, get_object_or_404
-from django.db.models import Count
+from django.shortcuts import render
+from django.db.models import Count, F
+from django.http import Http404
+from .caching import cached
+from .metrics import subscriber_count
 from .models import Content
 
-def home(request):
-    featured_posts = Content.objects.filter(is_featured=True)[:3]
-    post_list = Content.objects.all()[:10]
-    total_count = Content.objects.count()
+# WSGI environ flag set by `manage.py warm_caches`/`bench_api`; never settable
+# by clients. Events from such synthetic requests are not recorded.
+WARMUP_ENVIRON_KEY = "healthtakeaways.warmup"
+
+def home_context():
+    featured_posts = cached("home:featured", lambda: list(Content.objects.filter(is_featured=True)[:3]))
+    post_list = cached("home:latest", lambda: list(Content.objects.all()[:10]))
 
     # Count by type
-    counts = Content.objects.values("content_type").annotate(total=Count("id"))
-    type_counts = {c["content_type"]: c["total"] for c in counts}
+    def count_by_type():
+        counts = Content.objects.values("content_type").annotate(total=Count("id"))
+        return {c["content_type"]: c["total"] for c in counts}
+    type_counts = cached("home:type_counts", count_by_type)
 
-    context = {
+    return {
         "featured_posts": featured_posts,
         "post_list": post_list,
-        "total_count": total_count,
-        "subscriber_count": 1200,  # Replace with real data from WhatsApp API
+        "total_count": sum(type_counts.values()),
+        "subscriber_count": subscriber_count(),
         "text_count": type_counts.get("text", 0),
         "article_count": type_counts.get("article", 0),
         "image_count": type_counts.get("image", 0),
         "video_count": type_counts.get("video", 0),
         "poll_count": type_counts.get("poll", 0),
     }
-    return render(request, "home.html", context)
+
+def home(request):
+    return render(request, "home.html", home_context())
 
 # core/views.py
 from django.shortcuts import render
 from django.db.models import Q
 from django.core.paginator import Paginator
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .analytics import record_event
 from .models import Content
 
-def content_list(request):
-    ctype = (request.GET.get("type") or "").strip().lower()
+CONTENT_LIST_PAGE_SIZE = 12
+
+def content_list_context(ctype="", q="", page_number=None):
     allowed = {key for key, _ in Content.CONTENT_TYPES}
+    if ctype not in allowed:
+        ctype = ""  # unknown ?type= lists everything; never let it reach cache keys
 
     qs = Content.objects.all()
-    if ctype in allowed:
+    if ctype:
         qs = qs.filter(content_type=ctype)
 
     # (Optional) basic search support: ?q=...
-    q = (request.GET.get("q") or "").strip()
     if q:
         qs = qs.filter(
             Q(title__icontains=q) |
@@ -48,33 +64,74 @@ def content_list(request):
         )
 
     # Pagination (adjust per page as you like)
-    paginator = Paginator(qs, 12)
-    page_number = request.GET.get("page")
+    paginator = Paginator(qs, CONTENT_LIST_PAGE_SIZE)
+    if not q:
+        # Searches are too varied to be worth caching; listings are not.
+        paginator.count = cached(f"list:{ctype}:count", qs.count)
     page_obj = paginator.get_page(page_number)
+    if not q:
+        page_obj.object_list = cached(
+            f"list:{ctype}:page:{page_obj.number}", lambda: list(page_obj.object_list)
+        )
 
-    context = {
+    return {
         "post_list": page_obj.object_list,
         "page_obj": page_obj,
         "is_paginated": page_obj.has_other_pages(),
         "ctype": ctype or None,   # <-- use this in template instead of request.GET.type
         "q": q,
     }
-    return render(request, "content_list.html", context)
-
 
-def content_detail(request, pk):
-    content = get_object_or_404(Content, pk=pk)
+def content_list(request):
+    ctype = (request.GET.get("type") or "").strip().lower()
+    q = (request.GET.get("q") or "").strip()
+    context = content_list_context(ctype, q, request.GET.get("page"))
+    return render(request, "content_list.html", context)
 
-    # Update view count
-    content.view_count += 1
-    content.save(update_fields=["view_count"])
 
+def content_detail_context(content):
     # For polls, we may need options
     poll = getattr(content, "poll", None)
 
-    context = {
+    return {
         "content": content,
         "poll": poll,
-        "total_votes": 200, 
+        "total_votes": 200,
     }
-    return render(request, "content_detail.html", context)
\ No newline at end of file
+
+def get_detail_content(pk):
+    def load():
+        # False (not None) marks a cached miss, so 404s are cached too.
+        qs = Content.objects.select_related("poll").prefetch_related("poll__options")
+        return qs.filter(pk=pk).first() or False
+    return cached(f"content:{pk}", load) or None
+
+def content_detail(request, pk):
+    content = get_detail_content(pk)
+    if content is None:
+        raise Http404("No Content matches the given query.")
+
+    # Views are counted by the page's "view" beacon (see track_event), so
+    # pre-rendered copies served by the proxy are counted too.
+    return render(request, "content_detail.html", content_detail_context(content))
+
+
+@csrf_exempt
+@require_POST
+def track_event(request, pk):
+    """
+    Beacon endpoint for client-side events (page views, share buttons,
+    poll votes). Queues the event; a view also bumps view_count with one
+    UPDATE. The cached detail row is not invalidated by this, so the
+    shown count may lag. Clients without JavaScript (most crawlers) are
+    not counted.
+    """
+    kind = request.POST.get("kind")
+    if kind not in {"view", "share", "vote"}:
+        return HttpResponseBadRequest("unknown event")
+    if request.META.get(WARMUP_ENVIRON_KEY):
+        return HttpResponse(status=204)
+    if kind == "view":
+        Content.objects.filter(pk=pk).update(view_count=F("view_count") + 1)
+    record_event(pk, kind)
+    return HttpResponse(status=204)
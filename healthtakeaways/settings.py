@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.SamplingProfilerMiddleware',  # no-op unless PROFILING_ENABLED
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +76,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.css_bundle',
             ],
         },
     },
@@ -94,6 +96,22 @@ DATABASES = {
 }
 
 
+# Cache
+# File-based so every worker process (and `manage.py warm_caches`) shares it.
+# Keys are versioned by content generation, see core/caching.py.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -130,6 +148,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles" 
+STATICFILES_DIRS = [BASE_DIR / "static"]
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -137,4 +156,53 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'                   # where @login_required sends you
 LOGIN_REDIRECT_URL = '/blogger/'      # default after login
-LOGOUT_REDIRECT_URL = '/'             # after logout
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'             # after logout
+
+# Analytics event log (see core/analytics.py); roll up with `manage.py rollup_analytics`
+ANALYTICS_ENABLED = True
+ANALYTICS_LOG_DIR = BASE_DIR / "var" / "analytics"
+ANALYTICS_BATCH_SIZE = 500
+ANALYTICS_FLUSH_INTERVAL = 2.0  # seconds
+
+# Static pre-rendering (see core/prerender.py and `manage.py prerender_site`)
+PRERENDER_ROOT = BASE_DIR / "var" / "prerender"
+PRERENDER_ENABLED = False  # queue re-renders of affected pages after blogger saves (needs run_worker)
+PRERENDER_HOST = "localhost"  # the public host name; prerender_site refuses localhost unless DEBUG
+PRERENDER_HTTPS = False
+
+# Database-backed job queue (see core/jobs.py); run handlers with `manage.py run_worker`
+JOBS_CONCURRENCY = 4
+JOBS_POLL_INTERVAL = 1.0   # seconds between polls of an empty queue
+JOBS_TIMEOUT = 10 * 60     # a job running longer than this is assumed lost and retried
+JOBS_RETENTION_DAYS = 7    # finished jobs are purged after this; failed ones are kept
+
+# Spooled sitemap/feed bodies, one directory per content generation (core/feeds.py)
+FEEDS_CACHE_DIR = BASE_DIR / "var" / "feeds"
+
+# Sampling request profiler (core.middleware.SamplingProfilerMiddleware);
+# summarize dumps with `manage.py profile_report`
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.01     # fraction of requests run under cProfile
+PROFILING_SLOW_MS = 1000         # always keep a stack-sampled profile above this
+PROFILING_INTERVAL_MS = 5
+PROFILING_DIR = BASE_DIR / "var" / "profiles"
+PROFILING_MAX_DUMPS = 500
+
+# Subscriber count shown on the home page (see core/metrics.py). Served from
+# cache and refreshed in the background; point SUBSCRIBER_SOURCE at
+# core.metrics.WhatsAppSubscriberSource with {"url": ..., "token": ...} in production.
+SUBSCRIBER_SOURCE = "core.metrics.FakeSubscriberSource"
+SUBSCRIBER_SOURCE_OPTIONS = {"count": 1200}
+SUBSCRIBER_FRESH_SECONDS = 5 * 60
+SUBSCRIBER_MAX_STALE_SECONDS = 24 * 60 * 60
+SUBSCRIBER_COUNT_DEFAULT = 1200
+
+# Self-hosted CSS (see `manage.py build_css`). Off: Tailwind is compiled in
+# the browser from its CDN, handy while editing templates. On: base.html links
+# static/build/site.css + icons.css, which only exist after build_css (it needs
+# the Tailwind CLI and vendor/ files) and collectstatic -- so opt in per deploy.
+CSS_BUNDLE = False
+CSS_BUILD_DIR = BASE_DIR / "static" / "build"
+TAILWIND_CLI = "tailwindcss"  # v3 standalone binary, or e.g. "npx tailwindcss@3"
+FONT_AWESOME_DIR = BASE_DIR / "vendor" / "fontawesome"  # unpacked fontawesome-free-6.x-web
+INTER_FONT_FILE = BASE_DIR / "vendor" / "inter" / "InterVariable.woff2"